@@ -1,9 +1,133 @@
 from django.contrib import admin
-from .models import Todo
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from django.utils.functional import cached_property
+from .cache import invalidate
+from .deletion import mark_todos, request_account_deletion
+from .models import ArchivedTodo, Todo
+from .profiling import dump_path, list_dumps
+from .routers import shard_for
+from .stats import adjust, count_todos
+
+
+class CappedCountPaginator(Paginator):
+    """Counts at most ``limit`` rows, so a changelist over millions of todos runs no full COUNT(*).
+
+    Pages past the limit are not linked; filters narrow the list instead.
+    """
+    limit = 10000
+    capped = False
+
+    @cached_property
+    def count(self):
+        # Ordered like the page, so both walk the same index; unordered, a filter
+        # no index covers (e.g. a completed date range) scans the whole table.
+        count = self.object_list[:self.limit + 1].count()
+        self.capped = count > self.limit
+        return min(count, self.limit)
 
 
 class TodoAdmin(admin.ModelAdmin):
+    list_display = ('title', 'author', 'completed', 'edited')
+    list_select_related = ('author',)
+    # Both backed by indexes; "No date" / "Has date" of completed splits current from completed todos.
+    list_filter = ('completed', 'edited')
+    ordering = ('-edited',)
+    autocomplete_fields = ('author',)
     readonly_fields = ('edited',)
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+    actions = ('complete_selected', 'reopen_selected')
+
+    @staticmethod
+    def _move(todos, change, current):
+        """Apply ``change`` to ``todos`` with one UPDATE and move the counts of their authors by ``current`` each."""
+        with transaction.atomic(using=todos.db):
+            authors = dict(todos.order_by().values_list('author_id').annotate(Count('id')))
+            changed = change(todos)
+            for author_id, count in authors.items():
+                adjust(author_id, current=current * count, completed=-current * count)
+        for author_id in authors:
+            invalidate(author_id)
+        return changed
+
+    @admin.action(description='Mark selected todos as done')
+    def complete_selected(self, request, queryset):
+        changed = self._move(queryset.filter(completed__isnull=True), lambda todos: todos.complete(), -1)
+        self.message_user(request, f'Marked {changed} todos as done.')
+
+    @admin.action(description='Reopen selected todos')
+    def reopen_selected(self, request, queryset):
+        changed = self._move(queryset.filter(completed__isnull=False), lambda todos: todos.reopen(), 1)
+        self.message_user(request, f'Reopened {changed} todos.')
+
+    def get_deleted_objects(self, objs, request):
+        # Todos have no related rows; listing each selected one is all the default would do.
+        count = len(objs) if isinstance(objs, list) else objs.count()
+        return [f'{count} todos'], {'todos': count}, set(), []
+
+    def save_model(self, request, obj, form, change):
+        # The form can complete, reopen or reassign the todo; move the counts as the views do.
+        before = (form.initial['author'], form.initial['completed'] is not None) if change else (None, False)
+        with transaction.atomic(using=shard_for(obj.author_id)):
+            super().save_model(request, obj, form, change)
+            after = (obj.author_id, obj.completed is not None)
+            if before != after:
+                for (author_id, completed), sign in ((before, -1), (after, 1)):
+                    if author_id is not None:
+                        adjust(author_id, current=0 if completed else sign, completed=sign if completed else 0)
+        if before[0] not in (None, obj.author_id):
+            invalidate(before[0])
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, Todo.objects.using(obj._state.db).filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic(using=queryset.db):
+            counts = count_todos(queryset, ArchivedTodo.objects.none())
+            mark_todos(queryset)
+            for author_id, (current, completed) in counts.items():
+                adjust(author_id, current=-current, completed=-completed)
+        for author_id in counts:
+            invalidate(author_id)
+
+
+class DeferredDeleteUserAdmin(UserAdmin):
+    """Deletes users through ``purge()`` instead of one cascade over all their todos."""
+
+    def get_deleted_objects(self, objs, request):
+        # Collecting every related todo for the confirmation page is the cost being avoided.
+        objs = list(objs)
+        return [str(obj) for obj in objs], {'users': len(objs)}, set(), []
+
+    def delete_model(self, request, obj):
+        request_account_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            request_account_deletion(user)
 
 
 admin.site.register(Todo, TodoAdmin)
+admin.site.unregister(User)
+admin.site.register(User, DeferredDeleteUserAdmin)
+
+
+@staff_member_required
+def profile_list(request):
+    context = dict(admin.site.each_context(request), title='Request profiles', dumps=list_dumps())
+    return render(request, 'admin/todo/profiles.html', context)
+
+
+@staff_member_required
+def profile_download(request, filename):
+    path = dump_path(filename)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=filename.endswith('.prof'), filename=filename)
@@ -0,0 +1,139 @@
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+
+from .cache import invalidate
+from .deletion import mark_todos
+from .forms import TodoCreateForm
+from .live import publish_resync
+from .models import Todo, in_id_range
+from .routers import shard_for
+from .stats import adjust
+
+
+def api_login_required(view_func):
+    """Like ``login_required`` but answers anonymous requests with 401 instead of a redirect."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def _load_batch(request, key):
+    """Return the list stored under ``key`` in the JSON body or a 400 response explaining what is wrong."""
+    try:
+        items = json.loads(request.body).get(key)
+    except (ValueError, AttributeError):
+        return None, JsonResponse({'error': 'Body must be a JSON object.'}, status=400)
+    if not isinstance(items, list):
+        return None, JsonResponse({'error': f'"{key}" must be a list.'}, status=400)
+    if len(items) > settings.TODO_API_MAX_BATCH:
+        return None, JsonResponse(
+            {'error': f'At most {settings.TODO_API_MAX_BATCH} items per batch.'}, status=400)
+    return items, None
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool) and in_id_range(value)
+
+
+def _load_ids(request):
+    ids, error = _load_batch(request, 'ids')
+    if error:
+        return None, None, error
+    return ids, {todo_id for todo_id in ids if _is_id(todo_id)}, None
+
+
+@require_POST
+@api_login_required
+def bulk_create_todos(request):
+    items, error = _load_batch(request, 'todos')
+    if error:
+        return error
+
+    results, new_todos = [], []
+    for index, item in enumerate(items):
+        form = TodoCreateForm(item if isinstance(item, dict) else {})
+        if form.is_valid():
+            todo = form.save(commit=False)
+            todo.author = request.user
+            new_todos.append(todo)
+            results.append({'index': index, 'status': 'created'})
+        else:
+            results.append({'index': index, 'status': 'invalid', 'errors': form.errors})
+
+    alias = shard_for(request.user)
+    with transaction.atomic(using=alias):
+        Todo.objects.using(alias).bulk_create(new_todos)
+        if new_todos:
+            adjust(request.user.id, current=len(new_todos))
+            publish_resync(request.user.id, using=alias)
+    if new_todos:
+        invalidate(request.user.id)
+    return JsonResponse({'created': len(new_todos), 'results': results})
+
+
+@require_POST
+@api_login_required
+def bulk_complete_todos(request):
+    ids, valid_ids, error = _load_ids(request)
+    if error:
+        return error
+
+    todos = Todo.objects.for_author(request.user).filter(id__in=valid_ids)
+    with transaction.atomic(using=todos.db):
+        states = dict(todos.values_list('id', 'completed'))
+        completed = todos.filter(completed__isnull=True).complete()
+        if completed:
+            adjust(request.user.id, current=-completed, completed=completed)
+            publish_resync(request.user.id, using=todos.db)
+    if completed:
+        invalidate(request.user.id)
+
+    results = []
+    for todo_id in ids:
+        if not _is_id(todo_id):
+            status = 'invalid'
+        elif todo_id not in states:
+            status = 'not_found'
+        elif states[todo_id] is not None:
+            status = 'already_completed'
+        else:
+            status = 'completed'
+        results.append({'id': todo_id, 'status': status})
+    return JsonResponse({'completed': completed, 'results': results})
+
+
+@require_POST
+@api_login_required
+def bulk_delete_todos(request):
+    ids, valid_ids, error = _load_ids(request)
+    if error:
+        return error
+
+    todos = Todo.objects.for_author(request.user).filter(id__in=valid_ids)
+    with transaction.atomic(using=todos.db):
+        states = dict(todos.values_list('id', 'completed'))
+        # Hidden at once and deleted in batches later, so large batches do not hold the write lock.
+        deleted = mark_todos(todos)
+        if deleted:
+            current = sum(1 for completed in states.values() if completed is None)
+            adjust(request.user.id, current=-current, completed=current - len(states))
+            publish_resync(request.user.id, using=todos.db)
+    if deleted:
+        invalidate(request.user.id)
+
+    results = []
+    for todo_id in ids:
+        if not _is_id(todo_id):
+            status = 'invalid'
+        else:
+            status = 'deleted' if todo_id in states else 'not_found'
+        results.append({'id': todo_id, 'status': status})
+    return JsonResponse({'deleted': deleted, 'results': results})
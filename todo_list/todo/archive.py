@@ -0,0 +1,63 @@
+"""Archive tier for old completed todos.
+
+``archive_todos`` moves todos completed before a cutoff from the todo table
+to ``ArchivedTodo`` in chunks, each chunk in its own transaction, so the
+table and indexes the current list reads stay small. The completed list
+pages into the archive after the todo table (see
+``pagination.tiered_paginate``). Archived todos count as completed in
+``TodoStats`` and are not searchable until restored.
+"""
+from django.db import reset_queries, transaction
+
+from .cache import invalidate
+from .models import ArchivedTodo, Todo, keep_edited
+
+
+def archive_completed(alias, cutoff, batch_size=2000, author_id=None):
+    """Move the todos of database ``alias`` completed before ``cutoff`` to the archive; return how many."""
+    todos = Todo.objects.using(alias).filter(completed__lt=cutoff).order_by('id')
+    if author_id is not None:
+        todos = todos.filter(author_id=author_id)
+    archived = 0
+    while True:
+        with transaction.atomic(using=alias):
+            batch = list(todos[:batch_size])
+            if not batch:
+                break
+            ArchivedTodo.objects.using(alias).bulk_create([
+                ArchivedTodo(author_id=todo.author_id, title=todo.title, description=todo.description,
+                             edited=todo.edited, completed=todo.completed)
+                for todo in batch
+            ])
+            Todo.objects.using(alias).filter(id__in=[todo.id for todo in batch]).delete()
+        archived += len(batch)
+        for author in {todo.author_id for todo in batch}:
+            invalidate(author)
+        # With DEBUG on, every batch would stay in connection.queries.
+        reset_queries()
+    return archived
+
+
+def restore_todo(archived):
+    """Move one archived todo back to the todo table, with a new id; return the todo."""
+    alias = archived._state.db
+    todo = Todo(author_id=archived.author_id, title=archived.title, description=archived.description,
+                edited=archived.edited, completed=archived.completed)
+    with transaction.atomic(using=alias), keep_edited():
+        todo.save(using=alias, force_insert=True)
+        archived.delete()
+    return todo
+
+
+def restore(archived_todos, batch_size=2000):
+    """Move ``archived_todos`` back to the todo table in chunks; return how many."""
+    restored = 0
+    while True:
+        with transaction.atomic(using=archived_todos.db):
+            batch = list(archived_todos.order_by('id')[:batch_size])
+            for archived in batch:
+                restore_todo(archived)
+        if not batch:
+            return restored
+        restored += len(batch)
+        reset_queries()
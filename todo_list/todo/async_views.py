@@ -0,0 +1,109 @@
+"""Async versions of the read-only and account views, routed instead of the sync ones when ``TODO_ASYNC_VIEWS`` is on.
+
+Django 3.2 has no async queryset API, so the ORM work and template rendering
+of each view run in a single ``sync_to_async`` call; authentication, cache
+lookups and conditional GET handling happen on the event loop side. Password
+hashes are awaited on the ``todo.passwords`` pool, so they hold up neither the
+event loop nor the thread shared by ``sync_to_async`` calls.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import login
+from django.contrib.auth.models import User
+from django.contrib.auth.views import redirect_to_login
+from django.db import IntegrityError
+from django.shortcuts import redirect, resolve_url
+
+from .backends.auth import aauthenticate
+from .cache import cache_page_per_user
+from .conditional import conditional_todo, conditional_todo_list
+from .passwords import Overloaded, ahash_password, attempt_wait
+from .views import (OVERLOADED_RETRY_AFTER, render_index, render_sign_in, render_sign_up, render_todo,
+                    render_todo_list, render_too_many_attempts)
+
+
+def _is_authenticated(request):
+    return request.user.is_authenticated
+
+
+def async_login_required(view_func):
+    """Async counterpart of ``login_required(login_url='sign_in')``."""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        if await sync_to_async(_is_authenticated)(request):
+            return await view_func(request, *args, **kwargs)
+        return redirect_to_login(request.get_full_path(), resolve_url('sign_in'))
+    return wrapper
+
+
+async def index(request):
+    if await sync_to_async(_is_authenticated)(request):
+        return redirect('current_todos')
+    return await sync_to_async(render_index)(request)
+
+
+@async_login_required
+@conditional_todo_list(completed=False)
+@cache_page_per_user
+async def current_todos(request):
+    return await sync_to_async(render_todo_list)(request, completed=False, template_name='todo/view_todos.html')
+
+
+@async_login_required
+@conditional_todo_list(completed=True)
+@cache_page_per_user
+async def completed_todos(request):
+    return await sync_to_async(render_todo_list)(request, completed=True,
+                                                 template_name='todo/completed_todos.html')
+
+
+@async_login_required
+@conditional_todo
+@cache_page_per_user
+async def view_todo(request, todo_id):
+    return await sync_to_async(render_todo)(request, todo_id)
+
+
+def _create_user(username, password_hash):
+    user = User(username=User.normalize_username(username), password=password_hash)
+    user.save()
+    return user
+
+
+async def sign_up(request):
+    if request.method == 'GET':
+        return await sync_to_async(render_sign_up)(request)
+    if request.POST['password1'] != request.POST['password2']:
+        return await sync_to_async(render_sign_up)(request, 'Passwords do not match')
+    username = request.POST['username']
+    wait = await sync_to_async(attempt_wait)(request, username)
+    if wait:
+        return await sync_to_async(render_too_many_attempts)(render_sign_up, request, wait)
+    try:
+        password_hash = await ahash_password(request.POST['password1'])
+    except Overloaded:
+        return await sync_to_async(render_too_many_attempts)(render_sign_up, request, OVERLOADED_RETRY_AFTER)
+    try:
+        user = await sync_to_async(_create_user)(username, password_hash)
+    except IntegrityError:
+        return await sync_to_async(render_sign_up)(request, 'Login is already taken')
+    await sync_to_async(login)(request, user)
+    return redirect('current_todos')
+
+
+async def sign_in(request):
+    if request.method == 'GET':
+        return await sync_to_async(render_sign_in)(request)
+    username = request.POST['username']
+    wait = await sync_to_async(attempt_wait)(request, username)
+    if wait:
+        return await sync_to_async(render_too_many_attempts)(render_sign_in, request, wait)
+    try:
+        user = await aauthenticate(request, username=username, password=request.POST['password'])
+    except Overloaded:
+        return await sync_to_async(render_too_many_attempts)(render_sign_in, request, OVERLOADED_RETRY_AFTER)
+    if user is None:
+        return await sync_to_async(render_sign_in)(request, 'Incorrect username and/or password')
+    await sync_to_async(login)(request, user)
+    return redirect('current_todos')
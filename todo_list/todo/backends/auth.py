@@ -0,0 +1,81 @@
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.contrib import auth
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.signals import user_login_failed
+from django.core.exceptions import PermissionDenied
+
+from todo.passwords import averify_password, verify_password
+
+
+async def aauthenticate(request=None, **credentials):
+    """``django.contrib.auth.authenticate`` for async views, which Django only has from 5.0.
+
+    Tries each of ``AUTHENTICATION_BACKENDS`` in turn, awaiting ``aauthenticate``
+    where a backend has one and running ``authenticate`` in ``sync_to_async``
+    otherwise, and sends ``user_login_failed`` when none accepts the credentials.
+    """
+    for backend, backend_path in auth._get_backends(return_tuples=True):
+        try:
+            inspect.signature(backend.authenticate).bind(request, **credentials)
+        except TypeError:
+            # This backend doesn't accept these credentials as arguments.
+            continue
+        try:
+            if hasattr(backend, 'aauthenticate'):
+                user = await backend.aauthenticate(request, **credentials)
+            else:
+                user = await sync_to_async(backend.authenticate)(request, **credentials)
+        except PermissionDenied:
+            # This backend says to stop in our tracks - this user should not be allowed in at all.
+            break
+        if user is None:
+            continue
+        user.backend = backend_path
+        return user
+    await sync_to_async(user_login_failed.send)(
+        sender=auth.__name__, credentials=auth._clean_credentials(credentials), request=request)
+
+
+class PooledModelBackend(ModelBackend):
+    """``ModelBackend`` checking passwords on the ``todo.passwords`` hashing pool."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user_model = get_user_model()
+        if username is None:
+            username = kwargs.get(user_model.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = self.get_user_by_username(username)
+        valid, new_hash = verify_password(user, password)
+        if not valid or not self.user_can_authenticate(user):
+            return None
+        if new_hash is not None:
+            user.password = new_hash
+            user.save(update_fields=['password'])
+        return user
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        """Async ``authenticate`` for views under ASGI; the database work runs in ``sync_to_async``."""
+        if username is None:
+            username = kwargs.get(get_user_model().USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = await sync_to_async(self.get_user_by_username)(username)
+        valid, new_hash = await averify_password(user, password)
+        if not valid or not self.user_can_authenticate(user):
+            return None
+        if new_hash is not None:
+            user.password = new_hash
+            await sync_to_async(user.save)(update_fields=['password'])
+        return user
+
+    @staticmethod
+    def get_user_by_username(username):
+        user_model = get_user_model()
+        try:
+            return user_model._default_manager.get_by_natural_key(username)
+        except user_model.DoesNotExist:
+            return None
@@ -0,0 +1,82 @@
+"""SQLite backend tuned for serving: WAL, pragmas set on every new connection and retries on lock errors.
+
+Select it with ``'ENGINE': 'todo.backends.sqlite3'``. Besides the usual
+``sqlite3.connect()`` arguments, ``OPTIONS`` accepts ``pragmas`` (merged over
+``DatabaseWrapper.pragmas``), ``transaction_mode`` (``BEGIN`` mode of atomic
+blocks) and ``lock_retries``.
+"""
+import random
+import time
+
+from django.db.backends.sqlite3 import base
+from django.db.backends.sqlite3.base import Database
+
+CUSTOM_OPTIONS = ('pragmas', 'transaction_mode', 'lock_retries')
+
+
+class CursorWrapper(base.SQLiteCursorWrapper):
+    """Retry statements failing with "database is locked", with jittered exponential backoff.
+
+    Only statements run in autocommit mode are retried; inside an atomic block
+    the transaction has to be restarted as a whole, so the error is raised.
+    """
+
+    retry_delay = 0.01
+
+    def execute(self, query, params=None):
+        return self._retry(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._retry(super().executemany, query, list(param_list))
+
+    def _retry(self, method, *args):
+        delay = self.retry_delay
+        for attempt in range(self.db.lock_retries + 1):
+            try:
+                return method(*args)
+            except Database.OperationalError as e:
+                if 'database is locked' not in str(e) or attempt == self.db.lock_retries or self.db.in_atomic_block:
+                    raise
+            time.sleep(delay * (1 + random.random()))
+            delay *= 2
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pragmas = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -20000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    }
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = {**self.pragmas, **options.get('pragmas', {})}
+        self.transaction_mode = options.get('transaction_mode', 'IMMEDIATE')
+        self.lock_retries = options.get('lock_retries', 3)
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        for option in CUSTOM_OPTIONS:
+            kwargs.pop(option, None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=CursorWrapper)
+        cursor.db = self
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        # A deferred transaction that starts reading and then writes fails at
+        # once with "database is locked" under WAL instead of waiting for the
+        # busy timeout; IMMEDIATE takes the write lock up front.
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils.safestring import mark_safe
+
+from todo.instrumentation import current_timings
+from todo.minify import minify_html
+
+
+class TimedTemplate(Template):
+    """Template that adds its render time to the timings of the current request.
+
+    The output of ``.html`` templates is minified when ``TODO_MINIFY_HTML`` is
+    set, before the per-user page cache stores it.
+    """
+
+    def render(self, context=None, request=None):
+        timings = current_timings()
+        if timings is None:
+            return self._render(context, request)
+        start = time.perf_counter()
+        try:
+            return self._render(context, request)
+        finally:
+            timings.template_ms += (time.perf_counter() - start) * 1000
+
+    def _render(self, context, request):
+        output = super().render(context, request)
+        if settings.TODO_MINIFY_HTML and (self.origin.template_name or '').endswith('.html'):
+            return mark_safe(minify_html(output))
+        return output
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend whose templates report render time to ``InstrumentationMiddleware``."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,130 @@
+import asyncio
+import copy
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+
+def _version_key(user_id):
+    return f'todo:version:{user_id}'
+
+
+def get_version(user_id):
+    """Return the current cache version of the user's todos.
+
+    Versions are taken from a nanosecond clock rather than counted from 1, so a
+    version evicted from the cache is never reissued for stale entries.
+    """
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        # Another request may have stored one first; without a cache (DummyCache) every call gets a new one.
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate(user_id):
+    """Make every page cached for the user stale."""
+    cache.set(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def get_or_compute(user_id, name, compute):
+    """Return ``compute()`` cached under the user's current version; None results are not cached."""
+    key = f'todo:{name}:{user_id}:{get_version(user_id)}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if value is not None:
+            cache.set(key, value, settings.TODO_CACHE_TIMEOUT)
+    return value
+
+
+def page_key(user_id, path, csrf_cookie):
+    digest = hashlib.md5(f'{path}|{csrf_cookie}'.encode()).hexdigest()
+    return f'todo:page:{user_id}:{get_version(user_id)}:{digest}'
+
+
+def _lookup_page(request):
+    """Return ``(key, content)`` of the cached page; key is None when the request must not be cached."""
+    csrf_cookie = request.META.get('CSRF_COOKIE')
+    if request.method != 'GET' or not csrf_cookie:
+        return None, None
+    key = page_key(request.user.id, request.get_full_path(), csrf_cookie)
+    return key, cache.get(key)
+
+
+def _store_page(key, response):
+    if key and response.status_code == 200 and not response.streaming:
+        cache.set(key, response.content, settings.TODO_CACHE_TIMEOUT)
+    return response
+
+
+def cache_page_per_user(view_func):
+    """Cache the rendered page under the user's current version.
+
+    Pages embed the CSRF token, so the key also includes the CSRF cookie and
+    requests without one are never cached. Works for sync and async views.
+    """
+    if asyncio.iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            key, content = await sync_to_async(_lookup_page)(request)
+            if content is not None:
+                return HttpResponse(content)
+            return await sync_to_async(_store_page)(key, await view_func(request, *args, **kwargs))
+    else:
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            key, content = _lookup_page(request)
+            if content is not None:
+                return HttpResponse(content)
+            return _store_page(key, view_func(request, *args, **kwargs))
+    return wrapper
+
+
+def _user_key(user_id):
+    return f'todo:user:{user_id}'
+
+
+def get_cached_user(request):
+    """``django.contrib.auth.get_user`` that keeps the user in the cache between requests.
+
+    The cache holds the user without the password hash, which is deferred and
+    loaded again if anything reads it, next to the session hash derived from
+    it. The session hash is still checked against that; on a mismatch the user
+    is reloaded so Django can decide whether to end the session.
+    """
+    user_id = request.session.get(SESSION_KEY)
+    backend_path = request.session.get(BACKEND_SESSION_KEY)
+    if user_id is None or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+    key = _user_key(user_id)
+    cached = cache.get(key)
+    if cached is not None:
+        user_hash, user = cached
+        session_hash = request.session.get(HASH_SESSION_KEY)
+        if session_hash and constant_time_compare(session_hash, user_hash):
+            user.backend = backend_path
+            return user
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        without_password = copy.copy(user)
+        del without_password.__dict__['password']
+        cache.set(key, (user.get_session_auth_hash(), without_password), settings.TODO_USER_CACHE_TIMEOUT)
+    else:
+        cache.delete(key)
+    return user
+
+
+def forget_user(user_id):
+    cache.delete(_user_key(user_id))
@@ -0,0 +1,107 @@
+import asyncio
+from calendar import timegm
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_or_compute, get_version
+from .models import Todo
+
+
+def _conditional(validators):
+    """Same as Django's ``condition`` but for sync and async views and with revalidation forced.
+
+    ``validators(request, *args, **kwargs)`` returns ``(etag, last_modified)``.
+    Responses get ``Cache-Control: private, no-cache`` so browsers revalidate
+    every time instead of guessing freshness from Last-Modified.
+    """
+    def prepare(validated):
+        etag, last_modified = validated
+        return (quote_etag(etag) if etag else None,
+                timegm(last_modified.utctimetuple()) if last_modified else None)
+
+    def finalize(request, response, etag, last_modified):
+        if request.method in ('GET', 'HEAD'):
+            if last_modified and not response.has_header('Last-Modified'):
+                response.headers['Last-Modified'] = http_date(last_modified)
+            if etag:
+                response.headers.setdefault('ETag', etag)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def wrapper(request, *args, **kwargs):
+                etag, last_modified = prepare(await sync_to_async(validators)(request, *args, **kwargs))
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                return finalize(request, response, etag, last_modified)
+        else:
+            @wraps(view_func)
+            def wrapper(request, *args, **kwargs):
+                etag, last_modified = prepare(validators(request, *args, **kwargs))
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = view_func(request, *args, **kwargs)
+                return finalize(request, response, etag, last_modified)
+        return wrapper
+    return decorator
+
+
+def _with_version(user_id, etag, last_modified):
+    """Tie ``(etag, last_modified)`` to the user's cache version as well.
+
+    Every page shows the user's counts in the navbar, which change with todos
+    outside the page (e.g. deleting a completed todo changes the navbar of the
+    current list); the version moves with every such change. It also moves
+    when the user signs in, which rotates the CSRF token the pages embed.
+    """
+    version = get_version(user_id)
+    changed = datetime.fromtimestamp(version / 10 ** 9, timezone.utc)
+    return f'{etag}-{version}', max(last_modified, changed) if last_modified else changed
+
+
+def conditional_todo_list(completed):
+    """Answer conditional GETs of a todo list from ``max(edited)``, the row count and the user's cache version.
+
+    The first two come from one aggregate over the list's index, cached under the
+    user's version, so an unchanged list gets a 304 without loading or
+    rendering its rows.
+    """
+    name = 'completed-state' if completed else 'current-state'
+
+    def validators(request, *args, **kwargs):
+        state = get_or_compute(
+            request.user.id, name,
+            lambda: Todo.objects.for_author(request.user, replica=True).filter(
+                completed__isnull=not completed,
+            ).aggregate(last_edited=Max('edited'), count=Count('id')),
+        )
+        last_edited = state['last_edited']
+        timestamp = last_edited.timestamp() if last_edited else 0
+        return _with_version(request.user.id, f'{request.user.id}-{state["count"]}-{timestamp}', last_edited)
+
+    return _conditional(validators)
+
+
+def _todo_validators(request, todo_id):
+    edited = get_or_compute(
+        request.user.id, f'edited:{todo_id}',
+        lambda: Todo.objects.for_author(request.user, replica=True).filter(
+            pk=todo_id,
+        ).values_list('edited', flat=True).first(),
+    )
+    if edited is None:
+        return None, None
+    return _with_version(request.user.id, f'{request.user.id}-{todo_id}-{edited.timestamp()}', edited)
+
+
+def conditional_todo(view_func):
+    """Answer conditional GETs of a single todo page from the todo's ``edited`` and the user's cache version."""
+    return _conditional(_todo_validators)(view_func)
@@ -0,0 +1,13 @@
+from django.utils.functional import SimpleLazyObject
+
+from .stats import get_stats
+
+
+def todo_stats(request):
+    """Counts of the signed-in user's todos as ``todo_stats.current`` and ``todo_stats.completed``.
+
+    Lazy, so pages that do not show them make no query.
+    """
+    def load():
+        return get_stats(request.user) if request.user.is_authenticated else {}
+    return {'todo_stats': SimpleLazyObject(load)}
@@ -0,0 +1,122 @@
+"""Deferred deletion of large sets of todos and of whole accounts.
+
+A cascading delete of a user with hundreds of thousands of todos loads every
+todo into the collector and holds the SQLite write lock until it is done.
+Instead, deletions are requested here and carried out by ``purge()`` in
+batches of ``TODO_PURGE_BATCH_SIZE`` rows, one short transaction each, with
+``TODO_PURGE_PAUSE`` seconds between batches for other writers:
+
+* ``mark_todos()`` flags todos ``pending_delete``; ``Todo.objects`` hides them.
+* ``request_account_deletion()`` deactivates the user, which signs them out
+  everywhere, and records an ``AccountDeletion``.
+
+``purge()`` runs from the ``purge_deleted`` command or, with
+``TODO_PURGE_IN_PROCESS``, on a background thread woken by every deletion
+request.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, reset_queries, transaction
+
+from .models import AccountDeletion, ArchivedTodo, Todo, TodoStats
+from .routers import shard_for, todo_databases
+
+
+def mark_todos(todos):
+    """Flag ``todos`` for deletion and return how many were flagged."""
+    marked = todos.update(pending_delete=True)
+    if marked:
+        transaction.on_commit(schedule, using=todos.db)
+    return marked
+
+
+def request_account_deletion(user):
+    """Deactivate ``user`` and queue the account and its todos for deletion."""
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        AccountDeletion.objects.get_or_create(user=user)
+        transaction.on_commit(schedule)
+
+
+class PurgeStats:
+    """Rows deleted by ``purge()`` and the longest batch, i.e. the longest time the write lock was held."""
+
+    def __init__(self):
+        self.rows = 0
+        self.batches = 0
+        self.accounts = 0
+        self.max_batch_seconds = 0.0
+
+    def __str__(self):
+        return (f'{self.rows} rows in {self.batches} batches, {self.accounts} accounts, '
+                f'longest batch {self.max_batch_seconds * 1000:.1f} ms')
+
+
+def _delete_in_batches(queryset, stats, batch_size, pause):
+    """Delete the rows of ``queryset`` ``batch_size`` at a time, each batch in its own transaction."""
+    alias = queryset.db
+    while True:
+        start = time.perf_counter()
+        with transaction.atomic(using=alias):
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+            if ids:
+                queryset.model._base_manager.using(alias).filter(id__in=ids).delete()
+        if not ids:
+            return
+        stats.rows += len(ids)
+        stats.batches += 1
+        stats.max_batch_seconds = max(stats.max_batch_seconds, time.perf_counter() - start)
+        # With DEBUG on, every batch would stay in connection.queries.
+        reset_queries()
+        if pause:
+            time.sleep(pause)
+
+
+def purge(batch_size=None, pause=None):
+    """Delete every flagged todo and every account waiting for deletion; return ``PurgeStats``."""
+    batch_size = batch_size or settings.TODO_PURGE_BATCH_SIZE
+    pause = settings.TODO_PURGE_PAUSE if pause is None else pause
+    stats = PurgeStats()
+    for alias in todo_databases():
+        _delete_in_batches(Todo.all_objects.using(alias).filter(pending_delete=True), stats, batch_size, pause)
+
+    for user_id in AccountDeletion.objects.values_list('user_id', flat=True):
+        alias = shard_for(user_id)
+        for model in (Todo, ArchivedTodo):
+            _delete_in_batches(model._base_manager.using(alias).filter(author_id=user_id), stats, batch_size, pause)
+        # What is left (stats, placement, admin log entries) goes in one small cascade.
+        TodoStats.objects.using(alias).filter(user_id=user_id).delete()
+        User.objects.filter(pk=user_id).delete()
+        stats.accounts += 1
+    return stats
+
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _work():
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+        try:
+            purge()
+        finally:
+            connections.close_all()
+
+
+def schedule():
+    """Wake the background purge thread, starting it first if needed, when ``TODO_PURGE_IN_PROCESS`` is on."""
+    global _worker
+    if not settings.TODO_PURGE_IN_PROCESS:
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='todo-purge', daemon=True)
+            _worker.start()
+    _wakeup.set()
@@ -0,0 +1,123 @@
+"""Per-request timings and in-process latency histograms exported in the Prometheus text format."""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_current = ContextVar('todo_request_timings', default=None)
+
+
+def percentile(sorted_values, percent):
+    """The nearest-rank ``percent`` percentile of ``sorted_values``, as ``manage.py bench`` and ``loadtest`` report."""
+    index = min(len(sorted_values) - 1, max(0, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class RequestTimings:
+    """Database and template time spent by one request, in milliseconds."""
+
+    __slots__ = ('db_ms', 'queries', 'template_ms')
+
+    def __init__(self):
+        self.db_ms = 0.0
+        self.queries = 0
+        self.template_ms = 0.0
+
+
+def current_timings():
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding the query's time to the current request, if any.
+
+    Installed on every connection as it is created (see ``todo.signals``), since
+    connections are per thread and the ORM calls of async requests run in
+    ``sync_to_async`` threads; the request is found through the context variable,
+    which those threads inherit.
+    """
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_ms += (time.perf_counter() - start) * 1000
+        timings.queries += 1
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+class ViewMetrics:
+    __slots__ = ('buckets', 'count', 'seconds', 'db_seconds', 'queries', 'template_seconds')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.template_seconds = 0.0
+
+
+class MetricsRegistry:
+    """Cumulative latency histograms and database/template counters per view name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view_name, timings, total_ms):
+        seconds = total_ms / 1000
+        with self._lock:
+            metrics = self._views.get(view_name)
+            if metrics is None:
+                metrics = self._views[view_name] = ViewMetrics()
+            metrics.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            metrics.count += 1
+            metrics.seconds += seconds
+            metrics.db_seconds += timings.db_ms / 1000
+            metrics.queries += timings.queries
+            metrics.template_seconds += timings.template_ms / 1000
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render_prometheus(self):
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = [
+                '# HELP todo_request_duration_seconds Time spent handling requests, per view.',
+                '# TYPE todo_request_duration_seconds histogram',
+            ]
+            for view_name, metrics in views:
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), metrics.buckets):
+                    cumulative += count
+                    lines.append(f'todo_request_duration_seconds_bucket{{view="{view_name}",le="{bound}"}} {cumulative}')
+                lines.append(f'todo_request_duration_seconds_sum{{view="{view_name}"}} {metrics.seconds}')
+                lines.append(f'todo_request_duration_seconds_count{{view="{view_name}"}} {metrics.count}')
+            for name, attribute, description in (
+                ('todo_db_duration_seconds_total', 'db_seconds', 'Time spent in database queries, per view.'),
+                ('todo_db_queries_total', 'queries', 'Database queries executed, per view.'),
+                ('todo_template_duration_seconds_total', 'template_seconds', 'Time spent rendering templates, per view.'),
+            ):
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} counter')
+                for view_name, metrics in views:
+                    lines.append(f'{name}{{view="{view_name}"}} {getattr(metrics, attribute)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
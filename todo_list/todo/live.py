@@ -0,0 +1,209 @@
+"""Live updates of the todo lists over Server-Sent Events.
+
+Todo writes hand a small JSON event to ``broker`` once their transaction
+commits; ``LiveEventsApp``, which ``asgi.py`` puts in front of Django, streams
+the events of the signed-in user to each of their open tabs. The broker lives
+in the process, so a tab only hears about writes served by the same process.
+
+Memory is bounded: at most ``TODO_LIVE_MAX_CONNECTIONS`` streams per process
+and ``TODO_LIVE_MAX_PER_USER`` per user, each with a queue of at most
+``TODO_LIVE_QUEUE_SIZE`` events. A tab that does not keep up has its queue
+replaced by a single ``resync`` event, which makes the page reload, instead
+of the queue growing. Idle streams get a comment line every
+``TODO_LIVE_HEARTBEAT`` seconds so proxies keep them open.
+"""
+import asyncio
+import json
+import threading
+from importlib import import_module
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http.cookie import parse_cookie
+from django.urls import reverse
+from django.utils.text import Truncator
+
+from .cache import get_cached_user
+
+
+class TooManyConnections(Exception):
+    """Raised when the process or the user already has as many streams as allowed."""
+
+
+class Subscription:
+    """The events waiting to be sent to one open stream."""
+    __slots__ = ('loop', 'queue')
+
+    def __init__(self, loop, size):
+        self.loop = loop
+        self.queue = asyncio.Queue(size)
+
+    def offer(self, data):
+        """Queue ``data``; when the queue is full, replace its content with a ``resync`` event. Call on ``loop``."""
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    def close(self):
+        """Make the stream end, once the client is gone. Call on ``loop``."""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class Broker:
+    """Per-user publish/subscribe between the threads handling writes and the event loop serving streams."""
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """Return a new ``Subscription`` to the user's events; call on the event loop serving the stream."""
+        with self._lock:
+            subscriptions = self._subscriptions.get(user_id, ())
+            if (self._count >= settings.TODO_LIVE_MAX_CONNECTIONS
+                    or len(subscriptions) >= settings.TODO_LIVE_MAX_PER_USER):
+                raise TooManyConnections
+            subscription = Subscription(asyncio.get_running_loop(), settings.TODO_LIVE_QUEUE_SIZE)
+            self._subscriptions[user_id] = subscriptions + (subscription,)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscriptions = tuple(s for s in self._subscriptions.get(user_id, ()) if s is not subscription)
+            if subscriptions:
+                self._subscriptions[user_id] = subscriptions
+            else:
+                self._subscriptions.pop(user_id, None)
+            self._count -= 1
+
+    def connections(self):
+        return self._count
+
+    def publish(self, user_id, event):
+        """Send ``event`` to every stream of the user; safe to call from any thread."""
+        # The tuple is replaced, never changed, so it can be read without the lock.
+        subscriptions = self._subscriptions.get(user_id)
+        if not subscriptions:
+            return
+        data = encode(event)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, data)
+            except RuntimeError:
+                # The loop of the stream is closed; its unsubscribe is on the way.
+                pass
+
+
+broker = Broker()
+
+
+def encode(event):
+    return f'data: {json.dumps(event, separators=(",", ":"))}\n\n'.encode()
+
+
+RESYNC = encode({'op': 'resync'})
+
+
+def todo_event(todo, op):
+    """The event for ``todo`` after ``op`` (``saved``, ``completed`` or ``deleted``), as the list cards show it."""
+    event = {'op': op, 'id': todo.id}
+    if op == 'saved':
+        event.update(title=Truncator(todo.title).chars(50), description=Truncator(todo.description).chars(100),
+                     url=todo.get_absolute_url(), completed=todo.completed is not None)
+    return event
+
+
+def publish_todo(todo, op):
+    """Publish ``todo_event(todo, op)`` to the author's streams once the current transaction commits."""
+    event = todo_event(todo, op)
+    transaction.on_commit(lambda: broker.publish(todo.author_id, event), using=todo._state.db)
+
+
+def publish_resync(user_id, using=None):
+    """Make the user's open lists reload once the current transaction commits, e.g. after a bulk change."""
+    transaction.on_commit(lambda: broker.publish(user_id, {'op': 'resync'}), using=using)
+
+
+def _user_id_from_cookies(headers):
+    """Return the id of the user signed in with the session cookie in ``headers``, or None."""
+    cookies = {}
+    for name, value in headers:
+        if name == b'cookie':
+            cookies.update(parse_cookie(value.decode('latin-1')))
+    session_key = cookies.get(settings.SESSION_COOKIE_NAME)
+    if session_key is None:
+        return None
+    session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    user = get_cached_user(SimpleNamespace(session=session))
+    return user.id if user.is_authenticated else None
+
+
+async def _wait_for_disconnect(receive, subscription):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    subscription.close()
+
+
+class LiveEventsApp:
+    """ASGI application serving the ``live_events`` URL as an event stream and everything else with ``app``."""
+
+    def __init__(self, app):
+        self.app = app
+        self.path = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        if self.path is None:
+            self.path = reverse('live_events')
+        if scope['path'] != self.path:
+            return await self.app(scope, receive, send)
+
+        user_id = await sync_to_async(_user_id_from_cookies)(scope['headers'])
+        if user_id is None:
+            return await self._respond(send, 403)
+        try:
+            subscription = broker.subscribe(user_id)
+        except TooManyConnections:
+            return await self._respond(send, 503, [(b'retry-after', b'30')])
+        try:
+            await self._stream(subscription, receive, send)
+        finally:
+            broker.unsubscribe(user_id, subscription)
+
+    @staticmethod
+    async def _respond(send, status, headers=()):
+        await send({'type': 'http.response.start', 'status': status, 'headers': list(headers)})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    @staticmethod
+    async def _stream(subscription, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            # Stops nginx from buffering the stream.
+            (b'x-accel-buffering', b'no'),
+        ]})
+        retry = f'retry: {settings.TODO_LIVE_RETRY_MS}\n\n'.encode()
+        await send({'type': 'http.response.body', 'body': retry, 'more_body': True})
+        watcher = asyncio.ensure_future(_wait_for_disconnect(receive, subscription))
+        try:
+            while True:
+                try:
+                    data = await asyncio.wait_for(subscription.queue.get(), settings.TODO_LIVE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    data = b':\n\n'
+                if data is None:
+                    return
+                await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+        finally:
+            watcher.cancel()
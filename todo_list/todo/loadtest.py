@@ -0,0 +1,258 @@
+"""Load generator behind ``manage.py loadtest``: asyncio virtual users driving the todo pages over HTTP.
+
+Each virtual user signs in as one of the seeded accounts and then, until the
+run ends, repeats journeys picked by weight (see ``JOURNEYS``) with an
+exponentially distributed think time between them, over its own keep-alive
+connection. Only the standard library is used, so any WSGI or ASGI server can
+be the target, and so can the in-process server started by the command.
+"""
+import asyncio
+import random
+import re
+import time
+from collections import Counter
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.urls import reverse
+
+from .instrumentation import percentile
+
+JOURNEYS = ('list', 'view', 'create', 'complete', 'delete')
+TODO_ID = re.compile(rb'data-todo-id="(\d+)"')
+
+
+def parse_mix(value):
+    """Parse ``list=50,view=20,...`` into ``{journey: weight}``."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in JOURNEYS:
+            raise ValueError(f'Unknown journey "{name.strip()}"; choose from {", ".join(JOURNEYS)}.')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class HTTPError(Exception):
+    """Raised for a malformed response or a connection closed before the response."""
+
+
+class Connection:
+    """One HTTP/1.1 keep-alive connection, reopened when the server closes it."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers, body=b''):
+        """Send a request and return ``(status, headers, body)``; header names are lower case."""
+        # A keep-alive connection may have been closed by the server while idle; retry once on a fresh one.
+        for attempt in (1, 2):
+            fresh = self.writer is None
+            if fresh:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                     f'Content-Length: {len(body)}', *(f'{name}: {value}' for name, value in headers.items())]
+            self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+            try:
+                await self.writer.drain()
+                status_line = await self.reader.readline()
+            except ConnectionError:
+                status_line = b''
+            if status_line:
+                break
+            self.close()
+            if fresh or attempt == 2:
+                raise HTTPError('Connection closed before the response.')
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            self.close()
+            raise HTTPError(f'Bad status line {status_line!r}.')
+
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers.setdefault(name.strip().lower(), []).append(value.strip())
+
+        if 'content-length' in response_headers:
+            response_body = await self.reader.readexactly(int(response_headers['content-length'][0]))
+        elif 'chunked' in response_headers.get('transfer-encoding', [''])[0].lower():
+            response_body = await self._read_chunked()
+        else:
+            response_body = await self.reader.read()
+            self.close()
+        if 'close' in response_headers.get('connection', [''])[0].lower():
+            self.close()
+        return status, response_headers, response_body
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if not size:
+                await self.reader.readline()
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Recorder:
+    """Latencies and outcomes per route."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = Counter()
+        self.statuses = {}
+
+    def record(self, route, seconds, status):
+        """Record a request; ``status`` is None when it failed without a response."""
+        self.latencies.setdefault(route, []).append(seconds * 1000)
+        self.statuses.setdefault(route, Counter())[str(status)] += 1
+
+    def fail(self, route):
+        self.errors[route] += 1
+
+    def report(self, duration):
+        routes = {}
+        for route, latencies in sorted(self.latencies.items()):
+            latencies.sort()
+            routes[route] = {
+                'requests': len(latencies),
+                'errors': self.errors[route],
+                'error_rate': round(self.errors[route] / len(latencies), 4),
+                'rps': round(len(latencies) / duration, 2),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p90_ms': round(percentile(latencies, 90), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'max_ms': round(latencies[-1], 2),
+                'statuses': dict(self.statuses[route]),
+            }
+        requests = sum(route['requests'] for route in routes.values())
+        errors = sum(self.errors.values())
+        everything = sorted(latency for latencies in self.latencies.values() for latency in latencies)
+        total = {'requests': requests, 'errors': errors, 'error_rate': round(errors / requests, 4) if requests else 0,
+                 'rps': round(requests / duration, 2)}
+        if everything:
+            total.update(p50_ms=round(percentile(everything, 50), 2), p99_ms=round(percentile(everything, 99), 2))
+        return {'duration_s': round(duration, 2), 'total': total, 'routes': routes}
+
+
+class VirtualUser:
+    def __init__(self, connection, paths, recorder, username, password, rng):
+        self.connection = connection
+        self.paths = paths
+        self.recorder = recorder
+        self.username, self.password = username, password
+        self.rng = rng
+        self.cookies = {}
+        self.todo_ids = []
+
+    async def call(self, route, method, path, data=None, expect=200):
+        """Request ``path`` and return the body, or None if the response was not ``expect``."""
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        body = b''
+        if data is not None:
+            csrf_token = self.cookies.get(settings.CSRF_COOKIE_NAME, '')
+            body = urlencode({'csrfmiddlewaretoken': csrf_token, **data}).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        start = time.perf_counter()
+        try:
+            status, response_headers, response_body = await self.connection.request(method, path, headers, body)
+        except (OSError, asyncio.IncompleteReadError, HTTPError):
+            self.recorder.record(route, time.perf_counter() - start, None)
+            self.recorder.fail(route)
+            self.connection.close()
+            return None
+        self.recorder.record(route, time.perf_counter() - start, status)
+        for cookie in response_headers.get('set-cookie', []):
+            name, _, value = cookie.split(';', 1)[0].partition('=')
+            self.cookies[name.strip()] = value.strip().strip('"')
+        if status != expect:
+            self.recorder.fail(route)
+            return None
+        return response_body
+
+    def todo_path(self, route, todo_id):
+        return self.paths[route].replace('/0/', f'/{todo_id}/')
+
+    async def sign_in(self):
+        await self.call('sign_in_form', 'GET', self.paths['sign_in'])
+        body = await self.call('sign_in', 'POST', self.paths['sign_in'],
+                               {'username': self.username, 'password': self.password}, expect=302)
+        return body is not None
+
+    async def list(self):
+        body = await self.call('current_todos', 'GET', self.paths['current_todos'])
+        if body is not None:
+            # 0 is the placeholder card of live.js.
+            self.todo_ids = [int(todo_id) for todo_id in TODO_ID.findall(body) if todo_id != b'0']
+
+    async def view(self):
+        if not self.todo_ids:
+            return await self.list()
+        await self.call('view_todo', 'GET', self.todo_path('view_todo', self.rng.choice(self.todo_ids)))
+
+    async def create(self):
+        await self.call('create_todo', 'POST', self.paths['create_todo'],
+                        {'title': f'Load test {self.rng.randrange(10 ** 6)}', 'description': ''}, expect=302)
+
+    async def complete(self):
+        if not self.todo_ids:
+            return await self.list()
+        todo_id = self.todo_ids.pop(self.rng.randrange(len(self.todo_ids)))
+        await self.call('complete_todo', 'POST', self.todo_path('complete_todo', todo_id), {}, expect=302)
+
+    async def delete(self):
+        if not self.todo_ids:
+            return await self.list()
+        todo_id = self.todo_ids.pop(self.rng.randrange(len(self.todo_ids)))
+        await self.call('delete_todo', 'POST', self.todo_path('delete_todo', todo_id), {}, expect=302)
+
+    async def run(self, deadline, mix, think):
+        journeys, weights = list(mix), list(mix.values())
+        while time.monotonic() < deadline:
+            if settings.SESSION_COOKIE_NAME not in self.cookies and not await self.sign_in():
+                # Refused (e.g. 429 from the sign-in limits); back off before trying again.
+                await asyncio.sleep(min(think * 4 or 1, deadline - time.monotonic()))
+                continue
+            await getattr(self, self.rng.choices(journeys, weights)[0])()
+            if think:
+                await asyncio.sleep(min(self.rng.expovariate(1 / think), max(0, deadline - time.monotonic())))
+        self.connection.close()
+
+
+def route_paths():
+    paths = {name: reverse(name) for name in ('sign_in', 'current_todos', 'create_todo')}
+    paths.update((name, reverse(name, kwargs={'todo_id': 0})) for name in ('view_todo', 'complete_todo', 'delete_todo'))
+    return paths
+
+
+async def run(base_url, usernames, password, users, duration, ramp_up=0, think=1.0, mix=None, seed=0):
+    """Drive ``base_url`` with ``users`` virtual users for ``duration`` seconds; return the report."""
+    location = urlsplit(base_url)
+    paths = route_paths()
+    recorder = Recorder()
+    rng = random.Random(seed)
+    mix = mix or {journey: 1 for journey in JOURNEYS}
+    start = time.monotonic()
+    deadline = start + ramp_up + duration
+
+    async def start_user(index):
+        await asyncio.sleep(ramp_up * index / users)
+        user = VirtualUser(Connection(location.hostname, location.port or 80), paths, recorder,
+                           usernames[index % len(usernames)], password, random.Random(rng.random()))
+        await user.run(deadline, mix, think)
+
+    await asyncio.gather(*(start_user(index) for index in range(users)))
+    return recorder.report(time.monotonic() - start)
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from todo.archive import archive_completed
+from todo.routers import shard_for, todo_databases
+
+
+class Command(BaseCommand):
+    help = 'Move todos completed more than --older-than days ago to the archive, in chunked transactions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, required=True, help='Age in days of the completion.')
+        parser.add_argument('--user', help='Archive only the todos of this username.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Todos moved per transaction.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than'])
+        author_id, aliases = None, todo_databases()
+        if options['user']:
+            author_id = User.objects.filter(username=options['user']).values_list('id', flat=True).first()
+            if author_id is None:
+                raise CommandError(f'No user named {options["user"]}.')
+            aliases = [shard_for(author_id)]
+
+        archived = sum(archive_completed(alias, cutoff, options['batch_size'], author_id) for alias in aliases)
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} todos.'))
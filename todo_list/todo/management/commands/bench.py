@@ -0,0 +1,158 @@
+import json
+import time
+from contextlib import ExitStack
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, reset_queries, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from todo import urls
+from todo.cache import forget_user
+from todo.instrumentation import percentile
+from todo.models import ArchivedTodo, Todo
+from todo.routers import shard_for, todo_databases
+
+# Routes that only act on POST, with the form data to send; everything else is requested with GET.
+POST_ROUTES = {
+    'bulk_action': lambda todo: {'action': 'complete', 'ids': [todo.id]},
+    'complete_todo': lambda todo: {},
+    'delete_todo': lambda todo: {},
+    'restore_todo': lambda todo: {},
+    'sign_out': lambda todo: {},
+}
+# Routes that only act on POST, with the JSON body to send.
+JSON_ROUTES = {
+    'api_bulk_create': lambda todo: {'todos': [{'title': f'Bench {i}'} for i in range(50)]},
+    'api_bulk_complete': lambda todo: {'ids': [todo.id]},
+    'api_bulk_delete': lambda todo: {'ids': [todo.id]},
+}
+GET_PARAMS = {
+    'search_todos': {'q': 'a'},
+}
+# Routes whose todo_id is that of an archived todo.
+ARCHIVE_ROUTES = {'view_archived_todo', 'restore_todo'}
+# Routes only staff may request; the user is made staff inside the rolled back transaction.
+STAFF_ROUTES = {'metrics'}
+
+
+class Command(BaseCommand):
+    help = 'Request every named todo route through the test client and report latency, queries and size as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to sign in as; defaults to the user with the most todos.')
+        parser.add_argument('--iterations', type=int, default=50, help='Requests per route.')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request.')
+        parser.add_argument('--output', '-o', help='File to write the JSON report to instead of stdout.')
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        todos = Todo.objects.for_author(user)
+        todo = todos.filter(completed__isnull=True).first() or todos.first()
+
+        report = {'user': user.username, 'iterations': options['iterations'], 'cold': options['cold'], 'routes': {}}
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            # Reads first, so rolled back writes do not turn warm pages cold.
+            patterns = sorted(urls.urlpatterns, key=lambda pattern: pattern.name in {**POST_ROUTES, **JSON_ROUTES})
+            for pattern in patterns:
+                if 'todo_id' in pattern.pattern.converters and todo is None:
+                    continue
+                report['routes'][pattern.name] = self.bench_route(user, pattern, todo, options)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def get_user(username):
+        if username:
+            user = User.objects.filter(username=username).first()
+        else:
+            # Users and todos may live in different databases, so count per todo database.
+            counts = [Todo.objects.using(alias).values('author_id').annotate(todo_count=Count('id'))
+                      .order_by('-todo_count').first() for alias in todo_databases()]
+            counts = [count for count in counts if count]
+            top = max(counts, key=lambda count: count['todo_count']) if counts else None
+            user = User.objects.filter(pk=top['author_id']).first() if top else None
+        if user is None:
+            raise CommandError('No user to benchmark with; run seed_todos first.')
+        return user
+
+    @staticmethod
+    def archived_todo(user, todo):
+        """An archived todo of ``user``, archived from ``todo`` if they have none."""
+        archived = ArchivedTodo.objects.for_author(user).first()
+        if archived is None:
+            archived = ArchivedTodo.objects.for_author(user).create(
+                author=user, title=todo.title, description=todo.description, edited=todo.edited,
+                completed=todo.completed or timezone.now())
+        return archived
+
+    def bench_route(self, user, pattern, todo, options):
+        client = Client()
+        client.force_login(user)
+        name = pattern.name
+        method = 'POST' if name in POST_ROUTES or name in JSON_ROUTES else 'GET'
+        timings, queries = [], []
+        url = status = size = None
+        aliases = {DEFAULT_DB_ALIAS, shard_for(user)}
+        if name in STAFF_ROUTES:
+            forget_user(user.id)
+
+        for _ in range(options['iterations']):
+            if options['cold']:
+                cache.clear()
+            if name == 'sign_out':
+                client.force_login(user)
+            with ExitStack() as stack:
+                for alias in aliases:
+                    stack.enter_context(transaction.atomic(using=alias))
+                # Fixtures are written inside the transaction, so they are rolled back with the request.
+                if name in STAFF_ROUTES:
+                    User.objects.filter(pk=user.pk).update(is_staff=True)
+                kwargs = {}
+                if 'todo_id' in pattern.pattern.converters:
+                    kwargs['todo_id'] = self.archived_todo(user, todo).id if name in ARCHIVE_ROUTES else todo.id
+                url = reverse(name, kwargs=kwargs)
+                captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in aliases]
+                start = time.perf_counter()
+                if name in JSON_ROUTES:
+                    response = client.post(url, json.dumps(JSON_ROUTES[name](todo)),
+                                           content_type='application/json')
+                elif name in POST_ROUTES:
+                    response = client.post(url, POST_ROUTES[name](todo))
+                else:
+                    response = client.get(url, GET_PARAMS.get(name, {}))
+                if response.streaming:
+                    size = sum(len(chunk) for chunk in response.streaming_content)
+                else:
+                    size = len(response.content)
+                timings.append((time.perf_counter() - start) * 1000)
+                queries.append(sum(len(queries_of_alias) for queries_of_alias in captured))
+                status = response.status_code
+                for alias in aliases:
+                    transaction.set_rollback(True, using=alias)
+            reset_queries()
+        if name in STAFF_ROUTES:
+            # The cached user is still the staff one the rollback undid.
+            forget_user(user.id)
+
+        timings.sort()
+        return {
+            'method': method,
+            'url': url,
+            'status': status,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'queries': max(queries),
+            'bytes': size,
+        }
@@ -0,0 +1,39 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.transfer import FORMATS, export_rows, serialize, todo_querysets
+
+
+class Command(BaseCommand):
+    help = 'Stream todos, archived ones included, to an NDJSON or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-',
+                            help='File to write, "-" for stdout (default).')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Output format; guessed from the output file extension, NDJSON by default.')
+        parser.add_argument('--user', help='Export only the todos of this username.')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows fetched from the database at a time.')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or ('csv' if output.endswith('.csv') else 'ndjson')
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            querysets = todo_querysets(user) if user else []
+        else:
+            querysets = todo_querysets()
+
+        stream = sys.stdout if output == '-' else open(output, 'w', newline='', encoding='utf-8')
+        try:
+            rows = (row for todos in querysets for row in export_rows(todos, options['chunk_size']))
+            for line in serialize(rows, fmt):
+                stream.write(line)
+        except OSError as exc:
+            raise CommandError(f'Export failed: {exc}')
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
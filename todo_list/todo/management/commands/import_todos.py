@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.transfer import FORMATS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Stream todos from an NDJSON or CSV file into the database in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='File to read, "-" for stdin.')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Input format; guessed from the input file extension, NDJSON by default.')
+        parser.add_argument('--user', help='Import only the todos of this username.')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Todos inserted per bulk_create.')
+
+    def handle(self, *args, **options):
+        path = options['input']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+        try:
+            stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+        try:
+            imported, skipped = import_rows(read_rows(stream, fmt), options['batch_size'], options['user'])
+        except (KeyError, ValueError) as exc:
+            raise CommandError(f'Malformed input: {exc}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(self.style.SUCCESS(f'Imported {imported} todos, skipped {skipped}.'))
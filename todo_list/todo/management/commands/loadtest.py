@@ -0,0 +1,99 @@
+import asyncio
+import json
+import socket
+import threading
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+
+from todo.loadtest import JOURNEYS, parse_mix, run
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def setup(self):
+        super().setup()
+        # The headers and the body go out in separate writes; with Nagle's algorithm the body then waits
+        # for the client's delayed ACK, which adds 40 ms to every response.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = ('Drive the site with asyncio virtual users signed in as seeded accounts and report throughput, '
+            'error rate and latency percentiles per route. Without --url the site is served in this process '
+            'by a threaded WSGI server, which shares the CPU with the load generator; point --url at a '
+            'separate server (runserver, gunicorn, uvicorn) for numbers closer to production. Raise '
+            'TODO_LOGIN_LIMITS first, or most sign-ins from one address get a 429.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Site to test, e.g. http://127.0.0.1:8000; served in-process if omitted.')
+        parser.add_argument('--users', type=int, default=100, help='Number of virtual users.')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run after the ramp-up.')
+        parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which the users start.')
+        parser.add_argument('--think', type=float, default=1.0, help='Mean pause between journeys, in seconds.')
+        parser.add_argument('--mix', default='list=50,view=20,create=10,complete=10,delete=10',
+                            help=f'Weights of the journeys ({", ".join(JOURNEYS)}).')
+        parser.add_argument('--prefix', default='seed', help='Username prefix of the accounts to sign in as.')
+        parser.add_argument('--password', default='password', help='Password of those accounts.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible journeys.')
+        parser.add_argument('--output', '-o', help='File to write the JSON report to.')
+        parser.add_argument('--compare', help='Earlier JSON report to compare with.')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as exc:
+            raise CommandError(exc)
+        usernames = list(User.objects.filter(username__startswith=options['prefix'])
+                         .order_by('id').values_list('username', flat=True))
+        if not usernames:
+            raise CommandError(f'No "{options["prefix"]}" accounts to sign in as; run seed_todos first.')
+
+        server = None
+        url = options['url']
+        if not url:
+            server = ThreadedWSGIServer(('127.0.0.1', 0), QuietWSGIRequestHandler, allow_reuse_address=False)
+            server.set_app(get_wsgi_application())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f'http://127.0.0.1:{server.server_port}'
+        try:
+            report = asyncio.run(run(url, usernames, options['password'], options['users'], options['duration'],
+                                     options['ramp_up'], options['think'], mix, options['seed']))
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        report = {'url': url, 'users': options['users'], 'mix': mix, 'think_s': options['think'], **report}
+
+        self.write_table(report, self.load(options['compare']) if options['compare'] else None)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(json.dumps(report, indent=2) + '\n')
+
+    @staticmethod
+    def load(path):
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+
+    def write_table(self, report, previous):
+        self.stdout.write(f'{"route":16}{"requests":>10}{"rps":>9}{"errors":>8}{"p50 ms":>9}{"p90 ms":>9}'
+                          f'{"p99 ms":>9}{"max ms":>9}')
+        for name, route in report['routes'].items():
+            line = (f'{name:16}{route["requests"]:>10}{route["rps"]:>9.1f}{route["error_rate"]:>8.1%}'
+                    f'{route["p50_ms"]:>9.1f}{route["p90_ms"]:>9.1f}{route["p99_ms"]:>9.1f}{route["max_ms"]:>9.1f}')
+            before = previous and previous['routes'].get(name)
+            if before:
+                line += (f'   p50 {route["p50_ms"] - before["p50_ms"]:+.1f} ms, '
+                         f'p99 {route["p99_ms"] - before["p99_ms"]:+.1f} ms, rps {route["rps"] - before["rps"]:+.1f}')
+            self.stdout.write(line)
+        total = report['total']
+        self.stdout.write(self.style.SUCCESS(
+            f'{total["requests"]} requests in {report["duration_s"]} s, {total["rps"]} per second, '
+            f'{total["error_rate"]:.1%} errors.'))
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = 'Run migrate on the default database and on every todo shard.'
+
+    def handle(self, *args, **options):
+        for alias in [DEFAULT_DB_ALIAS, *settings.TODO_SHARDS]:
+            self.stdout.write(f'Migrating {alias}')
+            call_command('migrate', database=alias, interactive=False, verbosity=options['verbosity'],
+                         stdout=self.stdout, stderr=self.stderr)
+        self.stdout.write(self.style.SUCCESS(f'Migrated {len(settings.TODO_SHARDS)} shards.'))
@@ -0,0 +1,24 @@
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from todo.deletion import purge
+
+
+class Command(BaseCommand):
+    help = 'Delete the todos and accounts waiting for deletion, in batches of bounded size.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Rows per transaction; TODO_PURGE_BATCH_SIZE by default.')
+        parser.add_argument('--pause', type=float, help='Seconds between batches; TODO_PURGE_PAUSE by default.')
+        parser.add_argument('--measure', action='store_true', help='Also report the peak Python memory use.')
+
+    def handle(self, *args, **options):
+        if options['measure']:
+            tracemalloc.start()
+        stats = purge(options['batch_size'], options['pause'])
+        message = f'Purged {stats}.'
+        if options['measure']:
+            message += f' Peak memory {tracemalloc.get_traced_memory()[1] / 1e6:.1f} MB.'
+            tracemalloc.stop()
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,116 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries, transaction
+from django.utils import timezone
+
+from todo.cache import invalidate
+from todo.models import ArchivedTodo, Todo, TodoStats, keep_edited
+from todo.routers import home_shard, place_author, shard_for
+from todo.stats import recount
+
+
+class Command(BaseCommand):
+    help = ("Move the todos of users to another shard while the site keeps serving them. "
+            "Needs a cache shared with the web processes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to move.')
+        parser.add_argument('--to', help='Shard to move the user to.')
+        parser.add_argument('--all', action='store_true',
+                            help='Move every user whose placement differs from the hash over the current shards.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Todos copied or deleted at a time.')
+
+    def handle(self, *args, **options):
+        shards = settings.TODO_SHARDS
+        if not shards:
+            raise CommandError('No shards configured; set SHARDS.')
+        if isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+            # Placements are cached; the web processes would keep writing to the source
+            # shard after the switch, and those writes would be deleted with it.
+            raise CommandError('The local-memory cache is per process, so the site would not see the new '
+                               'placements; set CACHE_BACKEND to a cache shared with the web processes.')
+        if options['all']:
+            moves = [(user_id, home_shard(user_id)) for user_id in User.objects.values_list('id', flat=True)]
+        elif options['user'] and options['to']:
+            if options['to'] not in shards:
+                raise CommandError(f'Unknown shard {options["to"]}; shards are {", ".join(shards)}.')
+            user_id = User.objects.filter(username=options['user']).values_list('id', flat=True).first()
+            if user_id is None:
+                raise CommandError(f'No user named {options["user"]}.')
+            moves = [(user_id, options['to'])]
+        else:
+            raise CommandError('Give --user and --to, or --all.')
+
+        moved = 0
+        for user_id, target in moves:
+            source = shard_for(user_id)
+            if source != target:
+                count = self.move(user_id, source, target, options['batch_size'])
+                self.stdout.write(f'Moved {count} todos of user {user_id} from {source} to {target}.')
+                moved += 1
+        self.stdout.write(self.style.SUCCESS(f'Moved {moved} users.'))
+
+    def move(self, user_id, source, target, batch_size):
+        """Copy, switch the placement, catch up on writes made meanwhile, then delete the source rows.
+
+        Copies get new ids from the target, so links to the moved todos change.
+        Archived todos are moved last; do not run archive_todos meanwhile.
+        """
+        started = timezone.now()
+        source_todos = Todo.objects.using(source).filter(author_id=user_id).order_by('id')
+        copies = {}
+
+        def copy(todo):
+            source_id = todo.id
+            todo.id = copies.get(source_id)
+            todo.save(using=target, force_insert=todo.id is None)
+            copies[source_id] = todo.id
+
+        with keep_edited():
+            # Writes made during the copy go to the source and are caught up below.
+            last_id = 0
+            while True:
+                batch = list(source_todos.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                with transaction.atomic(using=target):
+                    for todo in batch:
+                        copy(todo)
+                reset_queries()
+
+            # From here on the site reads and writes the target.
+            place_author(user_id, target)
+            with transaction.atomic(using=target):
+                for todo in source_todos.filter(edited__gte=started):
+                    copy(todo)
+                kept = set(source_todos.values_list('id', flat=True))
+                Todo.objects.using(target).filter(
+                    id__in=[copy_id for source_id, copy_id in copies.items() if source_id not in kept]).delete()
+
+        # Todos waiting to be purged are not copied, but deleted here too.
+        leftovers = Todo.all_objects.using(source).filter(author_id=user_id).order_by('id')
+        while True:
+            ids = list(leftovers.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            Todo.all_objects.using(source).filter(id__in=ids).delete()
+            reset_queries()
+        source_archive = ArchivedTodo.objects.using(source).filter(author_id=user_id).order_by('id')
+        while True:
+            batch = list(source_archive[:batch_size])
+            if not batch:
+                break
+            ids = [archived.id for archived in batch]
+            for archived in batch:
+                archived.id = None
+            ArchivedTodo.objects.using(target).bulk_create(batch)
+            source_archive.filter(id__in=ids).delete()
+            reset_queries()
+        TodoStats.objects.using(source).filter(user_id=user_id).delete()
+        recount(user_id)
+        invalidate(user_id)
+        return len(copies)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of todos from the todo table.'
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError('Full-text search index is only available on SQLite.')
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
@@ -0,0 +1,42 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from todo.cache import invalidate
+from todo.models import ArchivedTodo, Todo, TodoStats
+from todo.routers import todo_databases
+from todo.stats import count_todos
+
+
+class Command(BaseCommand):
+    help = 'Recount the current and completed todos of every user and fix the stored counts that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Recount only this username.')
+
+    def handle(self, *args, **options):
+        user_id = None
+        if options['user']:
+            user_id = User.objects.filter(username=options['user']).values_list('id', flat=True).first()
+            if user_id is None:
+                raise CommandError(f'No user named {options["user"]}.')
+
+        fixed = 0
+        for alias in todo_databases():
+            todos, archived = Todo.objects.using(alias), ArchivedTodo.objects.using(alias)
+            stats = TodoStats.objects.using(alias)
+            if user_id is not None:
+                todos, archived = todos.filter(author_id=user_id), archived.filter(author_id=user_id)
+                stats = stats.filter(user_id=user_id)
+            # The counts are written in the transaction that counted them.
+            with transaction.atomic(using=alias):
+                counts = count_todos(todos, archived)
+                stored = {row[0]: row[1:] for row in stats.values_list('user_id', 'current_count', 'completed_count')}
+                for author_id in counts.keys() | stored.keys():
+                    current, completed = counts.get(author_id, (0, 0))
+                    if stored.get(author_id) != (current, completed):
+                        TodoStats.objects.using(alias).update_or_create(
+                            user_id=author_id, defaults={'current_count': current, 'completed_count': completed})
+                        invalidate(author_id)
+                        fixed += 1
+        self.stdout.write(self.style.SUCCESS(f'Fixed the counts of {fixed} users.'))
@@ -0,0 +1,20 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.archive import restore
+from todo.models import ArchivedTodo
+
+
+class Command(BaseCommand):
+    help = 'Move the archived todos of a user back to the todo table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Username whose todos to restore.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Todos moved per transaction.')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f'No user named {options["user"]}.')
+        restored = restore(ArchivedTodo.objects.for_author(user), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Restored {restored} todos.'))
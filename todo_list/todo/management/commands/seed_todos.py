@@ -0,0 +1,73 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import reset_queries
+from django.utils import timezone
+
+from todo.cache import invalidate
+from todo.models import Todo, keep_edited
+from todo.stats import recount
+
+WORDS = ('buy', 'call', 'write', 'review', 'fix', 'plan', 'book', 'send', 'clean', 'read',
+         'report', 'meeting', 'groceries', 'tickets', 'invoice', 'draft', 'garden', 'car',
+         'dentist', 'release', 'budget', 'notes', 'email', 'team', 'weekly', 'project')
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with generated users and todos for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--todos-per-user', type=int, default=100)
+        parser.add_argument('--completed-ratio', type=float, default=0.6,
+                            help='Share of todos that are completed.')
+        parser.add_argument('--prefix', default='seed', help='Username prefix of the generated users.')
+        parser.add_argument('--password', default='password', help='Password of every generated user.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible data.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        password = make_password(options['password'])
+        usernames = [f'{options["prefix"]}{i}' for i in range(options['users'])]
+        User.objects.bulk_create([User(username=username, password=password) for username in usernames],
+                                 ignore_conflicts=True)
+        user_ids = list(User.objects.filter(username__in=usernames).values_list('id', flat=True))
+
+        now = timezone.now()
+        batch, created = [], 0
+        with keep_edited():
+            for user_id in user_ids:
+                for _ in range(options['todos_per_user']):
+                    batch.append(self.make_todo(rng, user_id, now, options['completed_ratio']))
+                    if len(batch) >= options['batch_size']:
+                        created += self.flush(batch)
+                if batch:
+                    created += self.flush(batch)
+                recount(user_id)
+                invalidate(user_id)
+        self.stdout.write(self.style.SUCCESS(f'Seeded {len(user_ids)} users and {created} todos.'))
+
+    @staticmethod
+    def make_todo(rng, user_id, now, completed_ratio):
+        edited = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+        # Roughly a third of real todos have no description; the rest range from a line to a few paragraphs.
+        description_words = 0 if rng.random() < 0.3 else int(rng.lognormvariate(3, 1.2))
+        return Todo(
+            author_id=user_id,
+            title=' '.join(rng.choices(WORDS, k=rng.randint(1, 8))).capitalize(),
+            description=' '.join(rng.choices(WORDS, k=min(description_words, 2000))),
+            edited=edited,
+            completed=edited if rng.random() < completed_ratio else None,
+        )
+
+    @staticmethod
+    def flush(batch):
+        Todo.objects.bulk_create_by_author(batch)
+        count = len(batch)
+        batch.clear()
+        reset_queries()
+        return count
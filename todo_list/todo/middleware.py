@@ -0,0 +1,267 @@
+import asyncio
+import cProfile
+import json
+import mimetypes
+import time
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.contrib.staticfiles.storage import ManifestFilesMixin
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+from django.utils.text import compress_sequence, compress_string
+
+from .cache import get_cached_user
+from .instrumentation import end_request, registry, start_request
+from .profiling import profile_requested, should_profile, write_dump
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class StaticFile:
+    __slots__ = ('path', 'content_type', 'immutable', 'encoded')
+
+    def __init__(self, path, immutable):
+        self.path = path
+        self.content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        self.immutable = immutable
+        self.encoded = {}
+
+
+def accepted_encodings(header):
+    """Return the codings of an ``Accept-Encoding`` header that are not refused with ``q=0``."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip().partition('=')[2] if params.strip().startswith('q=') else '1'
+        try:
+            if coding.strip() and float(quality) > 0:
+                accepted.add(coding.strip().lower())
+        except ValueError:
+            pass
+    return accepted
+
+
+class StaticFilesMiddleware(MiddlewareMixin):
+    """Serve ``STATIC_ROOT`` without a separate web server.
+
+    The directory is indexed once at startup, so restart after
+    ``collectstatic``. A ``.br`` or ``.gz`` copy written by
+    ``todo.storage.CompressedManifestStaticFilesStorage`` is sent when the
+    client accepts it. Hashed names from the manifest are cached for a year as
+    ``immutable``; other files are revalidated after a minute. Enabled by
+    ``TODO_SERVE_STATIC``; put it first in ``MIDDLEWARE``.
+    """
+
+    encodings = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, get_response):
+        if not settings.TODO_SERVE_STATIC:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.files = self.index(Path(settings.STATIC_ROOT))
+
+    def index(self, root):
+        if not root.is_dir():
+            return {}
+        manifest = root / ManifestFilesMixin.manifest_name
+        hashed = set(json.loads(manifest.read_text())['paths'].values()) if manifest.is_file() else set()
+        paths = {path.relative_to(root).as_posix(): path for path in root.rglob('*') if path.is_file()}
+        files = {}
+        for name, path in paths.items():
+            if any(name.endswith(suffix) and name[:-len(suffix)] in paths for _, suffix in self.encodings):
+                continue
+            static_file = files[name] = StaticFile(path, name in hashed)
+            for encoding, suffix in self.encodings:
+                if name + suffix in paths:
+                    static_file.encoded[encoding] = paths[name + suffix]
+        return files
+
+    def serve(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(settings.STATIC_URL):
+            return None
+        static_file = self.files.get(request.path[len(settings.STATIC_URL):])
+        if static_file is None:
+            return None
+        path, encoding = static_file.path, None
+        if static_file.encoded:
+            accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+            encoding = next((encoding for encoding, _ in self.encodings
+                             if encoding in accepted and encoding in static_file.encoded), None)
+            if encoding is not None:
+                path = static_file.encoded[encoding]
+        response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+        if static_file.encoded:
+            response['Vary'] = 'Accept-Encoding'
+        if static_file.immutable:
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response['Cache-Control'] = 'public, max-age=60'
+        return response
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        response = self.serve(request)
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        response = self.serve(request)
+        return response if response is not None else await self.get_response(request)
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=5)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """``GZipMiddleware`` with brotli, when installed, and a configurable size threshold.
+
+    Responses shorter than ``TODO_COMPRESS_MIN_LENGTH`` bytes are sent as is;
+    streaming responses are always compressed.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.TODO_COMPRESS_MIN_LENGTH:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        if brotli is not None and 'br' in accepted:
+            encoding, compress, compress_stream = 'br', brotli.compress, brotli_sequence
+        elif 'gzip' in accepted:
+            encoding, compress, compress_stream = 'gzip', compress_string, compress_sequence
+        else:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class InstrumentationMiddleware(MiddlewareMixin):
+    """Measure database, template and total time of every request.
+
+    The timings are sent back in a ``Server-Timing`` header and added to the
+    per-view histograms served by the ``metrics`` view. Queries are timed by
+    ``todo.instrumentation.record_query`` and templates by the
+    ``todo.backends.templates.TimedDjangoTemplates`` backend.
+    Enabled by ``TODO_INSTRUMENTATION``; put it first in ``MIDDLEWARE`` so the
+    total covers the other middleware too.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TODO_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        timings, token = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self._finish(request, response, timings, start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        timings, token = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self._finish(request, response, timings, start)
+
+    @staticmethod
+    def _finish(request, response, timings, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        match = getattr(request, 'resolver_match', None)
+        registry.observe(match.view_name if match else 'unresolved', timings, total_ms)
+        response['Server-Timing'] = (
+            f'db;dur={timings.db_ms:.2f};desc="{timings.queries} queries", '
+            f'tpl;dur={timings.template_ms:.2f}, '
+            f'total;dur={total_ms:.2f}'
+        )
+        return response
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """``AuthenticationMiddleware`` loading ``request.user`` through ``todo.cache.get_cached_user``."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+    """Run requests picked by ``todo.profiling.should_profile`` under cProfile.
+
+    Must come after ``AuthenticationMiddleware``. The dump name is returned to
+    the caller in an ``X-Profile-Dump`` header and the dumps are listed at
+    ``/admin/profiles/``. Under ASGI only the code running on the event loop
+    thread is profiled, not the ORM calls handed to ``sync_to_async``.
+    """
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not should_profile(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        response['X-Profile-Dump'] = write_dump(profiler, request, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if profile_requested(request):
+            profile = await sync_to_async(should_profile)(request)
+        else:
+            profile = should_profile(request)
+        if not profile:
+            return await self.get_response(request)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        response['X-Profile-Dump'] = write_dump(profiler, request, time.perf_counter() - start)
+        return response
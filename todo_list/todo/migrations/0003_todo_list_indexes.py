@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0002_alter_todo_author'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('completed__isnull', True)), fields=['author', 'edited', 'id'], name='todo_current_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('completed__isnull', False)), fields=['author', 'edited', 'id'], name='todo_completed_idx'),
+        ),
+    ]
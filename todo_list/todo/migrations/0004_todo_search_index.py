@@ -0,0 +1,49 @@
+from django.db import migrations
+
+FTS_SQL = (
+    """CREATE VIRTUAL TABLE todo_todo_fts USING fts5(
+        title, description, author_id,
+        content='todo_todo', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER todo_todo_fts_insert AFTER INSERT ON todo_todo BEGIN
+        INSERT INTO todo_todo_fts(rowid, title, description, author_id)
+        VALUES (new.id, new.title, new.description, new.author_id);
+    END""",
+    """CREATE TRIGGER todo_todo_fts_delete AFTER DELETE ON todo_todo BEGIN
+        INSERT INTO todo_todo_fts(todo_todo_fts, rowid, title, description, author_id)
+        VALUES ('delete', old.id, old.title, old.description, old.author_id);
+    END""",
+    """CREATE TRIGGER todo_todo_fts_update AFTER UPDATE OF title, description, author_id ON todo_todo BEGIN
+        INSERT INTO todo_todo_fts(todo_todo_fts, rowid, title, description, author_id)
+        VALUES ('delete', old.id, old.title, old.description, old.author_id);
+        INSERT INTO todo_todo_fts(rowid, title, description, author_id)
+        VALUES (new.id, new.title, new.description, new.author_id);
+    END""",
+    "INSERT INTO todo_todo_fts(todo_todo_fts) VALUES ('rebuild')",
+)
+
+DROP_FTS_SQL = (
+    'DROP TRIGGER IF EXISTS todo_todo_fts_insert',
+    'DROP TRIGGER IF EXISTS todo_todo_fts_delete',
+    'DROP TRIGGER IF EXISTS todo_todo_fts_update',
+    'DROP TABLE IF EXISTS todo_todo_fts',
+)
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0003_todo_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(FTS_SQL), run_on_sqlite(DROP_FTS_SQL)),
+    ]
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import importlib
+
+search_index = importlib.import_module('todo.migrations.0004_todo_search_index')
+
+# SQLite rebuilds the table to drop the foreign key constraint, which drops the search index triggers.
+FTS_TRIGGERS_SQL = search_index.FTS_SQL[1:4]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('todo', '0004_todo_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShardPlacement',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='auth.user')),
+                ('shard', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.RunPython(migrations.RunPython.noop, search_index.run_on_sqlite(FTS_TRIGGERS_SQL)),
+        migrations.AlterField(
+            model_name='todo',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, default=1, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(search_index.run_on_sqlite(FTS_TRIGGERS_SQL), migrations.RunPython.noop),
+    ]
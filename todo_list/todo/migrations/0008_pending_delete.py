@@ -0,0 +1,40 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import importlib
+
+search_index = importlib.import_module('todo.migrations.0004_todo_search_index')
+
+# SQLite rebuilds the table to add the column, which drops the search index triggers.
+FTS_TRIGGERS_SQL = search_index.FTS_SQL[1:4]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('todo', '0007_archived_todo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDeletion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='auth.user')),
+                ('requested', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(migrations.RunPython.noop, search_index.run_on_sqlite(FTS_TRIGGERS_SQL)),
+        migrations.AddField(
+            model_name='todo',
+            name='pending_delete',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(search_index.run_on_sqlite(FTS_TRIGGERS_SQL), migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('pending_delete', True)), fields=['id'], name='todo_pending_delete_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0008_pending_delete'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['edited', 'id'], name='todo_edited_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('completed__isnull', True)), fields=['edited', 'id'], name='todo_all_current_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('completed__isnull', False)), fields=['edited', 'id'], name='todo_all_completed_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+"""Whitespace minification of rendered HTML."""
+import re
+
+# Whitespace is significant inside these elements, so they are copied as is.
+PRESERVED_RE = re.compile(r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL)
+INDENT_RE = re.compile(r'\n\s+')
+
+
+def minify_html(html):
+    """Drop indentation and blank lines, which browsers render the same as a single line break."""
+    parts = PRESERVED_RE.split(html)
+    # split() returns text, then the preserved element and its tag name for every match.
+    for index in range(0, len(parts), 3):
+        parts[index] = INDENT_RE.sub('\n', parts[index])
+    del parts[2::3]
+    return ''.join(parts)
@@ -1,17 +1,225 @@
+import unicodedata
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.db import models
+from django.db.models import Q, Value
+from django.db.models.functions import Substr
+from django.db.models.query import ValuesListIterable
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
+
+from .routers import read_db_for, shard_for
+
+# A todo as the list cards show it (see ``AuthorQuerySet.rows()``); ``archived`` is None for a ``Todo``.
+TodoRow = namedtuple('TodoRow', ['id', 'title', 'description', 'edited', 'completed', 'archived'])
+
+# Lengths of ``truncatechars`` in preview_card.html; one more character is fetched so the filter still truncates.
+CARD_TITLE_CHARS = 50
+CARD_DESCRIPTION_CHARS = 100
+
+# SQLite integers are signed 64-bit; a larger id cannot even be bound as a query parameter.
+MAX_ID = 2 ** 63 - 1
+
+
+def in_id_range(value):
+    """Whether the int ``value`` could be the id of a row."""
+    return 0 < value <= MAX_ID
+
+
+def _clipped(text, length):
+    """Whether ``truncatechars:length`` of ``text``, the first ``length + 1`` characters, could differ from the full text's.
+
+    The filter does not count combining characters and normalizes to NFC first,
+    so only a plain prefix (ASCII, or NFC without combining characters) is
+    sure to be truncated the same way as the full text.
+    """
+    if len(text) <= length or text.isascii():
+        return False
+    return unicodedata.normalize('NFC', text) != text or any(unicodedata.combining(char) for char in text)
+
+
+class TodoRowIterable(ValuesListIterable):
+    """Yields ``TodoRow`` tuples for ``AuthorQuerySet.rows()``."""
+
+    def __iter__(self):
+        rows = [TodoRow._make(row) for row in super().__iter__()]
+        # Rare prefixes ending in the middle of combining characters are replaced by the full text.
+        ids = [row.id for row in rows if _clipped(row.title, CARD_TITLE_CHARS)
+               or _clipped(row.description, CARD_DESCRIPTION_CHARS)]
+        if ids:
+            queryset = self.queryset.model._base_manager.using(self.queryset.db).filter(id__in=ids)
+            full = {todo_id: (title, description)
+                    for todo_id, title, description in queryset.values_list('id', 'title', 'description')}
+            rows = [row._replace(title=full[row.id][0], description=full[row.id][1]) if row.id in full else row
+                    for row in rows]
+        return iter(rows)
+
+
+class AuthorQuerySet(models.QuerySet):
+    def for_author(self, author, replica=False):
+        """The author's rows, on their shard or, with ``replica``, on a read replica of it."""
+        alias = read_db_for(author) if replica else shard_for(author)
+        return self.using(alias).filter(author_id=getattr(author, 'pk', author))
+
+    def create(self, **kwargs):
+        """``QuerySet.create()`` saving the row on its author's shard unless ``using()`` chose a database."""
+        if self._db is not None:
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        # With an instance to look at, the router places the row by its author.
+        obj.save(force_insert=True)
+        return obj
+
+    def bulk_create_by_author(self, todos, **kwargs):
+        """``bulk_create()`` the rows on the shards of their authors."""
+        by_shard = defaultdict(list)
+        for todo in todos:
+            by_shard[shard_for(todo.author_id)].append(todo)
+        return [created for alias, shard_todos in by_shard.items()
+                for created in self.using(alias).bulk_create(shard_todos, **kwargs)]
+
+    def rows(self):
+        """The rows as ``TodoRow`` tuples, with only the start of the title and description the cards show.
+
+        The database cuts the text, so a list of todos with long descriptions
+        reads and keeps a few hundred bytes per row instead of whole model
+        instances with every description in full.
+        """
+        archived = 'archived' if self.model is ArchivedTodo else Value(None, output_field=models.DateTimeField())
+        clone = self.values_list('id', Substr('title', 1, CARD_TITLE_CHARS + 1),
+                                 Substr('description', 1, CARD_DESCRIPTION_CHARS + 1), 'edited', 'completed', archived)
+        clone._iterable_class = TodoRowIterable
+        return clone
+
+
+_keeping_edited = ContextVar('todo_keeping_edited', default=False)
+
+
+@contextmanager
+def keep_edited():
+    """Let todos saved in this thread or task keep the given ``edited`` instead of ``auto_now`` replacing it.
+
+    Saves made elsewhere meanwhile, e.g. by concurrent requests, still get a new ``edited``.
+    """
+    token = _keeping_edited.set(True)
+    try:
+        yield
+    finally:
+        _keeping_edited.reset(token)
+
+
+class EditedField(models.DateTimeField):
+    """``DateTimeField(auto_now=True)`` leaving the value alone inside ``keep_edited()``."""
+
+    def pre_save(self, model_instance, add):
+        if _keeping_edited.get():
+            return getattr(model_instance, self.attname)
+        return super().pre_save(model_instance, add)
+
+    def deconstruct(self):
+        # Stored like any DateTimeField, so migrations need not know about it.
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.DateTimeField', args, kwargs
+
+
+class TodoQuerySet(AuthorQuerySet):
+    def complete(self):
+        """Mark the todos completed with a single UPDATE; returns the number of rows changed."""
+        now = timezone.now()
+        return self.update(completed=now, edited=now)
+
+    def reopen(self):
+        """Mark the todos not completed with a single UPDATE; returns the number of rows changed."""
+        return self.update(completed=None, edited=timezone.now())
+
+
+class TodoManager(models.Manager.from_queryset(TodoQuerySet)):
+    """Todos not waiting to be deleted by ``purge_deleted`` (see ``todo.deletion``)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(pending_delete=False)
 
 
 class Todo(models.Model):
     title = models.CharField(max_length=100)
     description = models.TextField(blank=True)
-    edited = models.DateTimeField(auto_now=True)
+    edited = EditedField(auto_now=True)
     completed = models.DateTimeField(blank=True, null=True)
-    author = models.ForeignKey(User, on_delete=models.CASCADE, default=1)
+    # No database constraint: with sharding the users live in another database.
+    author = models.ForeignKey(User, on_delete=models.CASCADE, default=1, db_constraint=False)
+    pending_delete = models.BooleanField(default=False)
+
+    objects = TodoManager()
+    all_objects = TodoQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'edited', 'id'], condition=Q(completed__isnull=True),
+                         name='todo_current_idx'),
+            models.Index(fields=['author', 'edited', 'id'], condition=Q(completed__isnull=False),
+                         name='todo_completed_idx'),
+            models.Index(fields=['id'], condition=Q(pending_delete=True), name='todo_pending_delete_idx'),
+            # For the admin changelist, which orders by edited and filters by completed across authors.
+            models.Index(fields=['edited', 'id'], name='todo_edited_idx'),
+            models.Index(fields=['edited', 'id'], condition=Q(completed__isnull=True), name='todo_all_current_idx'),
+            models.Index(fields=['edited', 'id'], condition=Q(completed__isnull=False),
+                         name='todo_all_completed_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
     def get_absolute_url(self):
         return reverse('view_todo', kwargs={'todo_id': self.id})
+
+
+class ArchivedTodo(models.Model):
+    """A completed todo moved out of the todo table by ``archive_todos`` (see ``todo.archive``)."""
+    title = models.CharField(max_length=100)
+    description = models.TextField(blank=True)
+    edited = models.DateTimeField()
+    completed = models.DateTimeField()
+    archived = models.DateTimeField(default=timezone.now)
+    author = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False)
+
+    objects = AuthorQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['author', 'edited', 'id'], name='archivedtodo_list_idx')]
+
+    def __str__(self):
+        return self.title
+
+    def get_absolute_url(self):
+        return reverse('view_archived_todo', kwargs={'todo_id': self.id})
+
+
+class TodoStats(models.Model):
+    """Numbers of current and completed todos of a user, kept next to the todos (see ``todo.stats``)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, db_constraint=False)
+    current_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.current_count} current, {self.completed_count} completed'
+
+
+class AccountDeletion(models.Model):
+    """A user whose account and todos ``purge_deleted`` deletes in batches; the user is deactivated meanwhile."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    requested = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.user_id} since {self.requested}'
+
+
+class ShardPlacement(models.Model):
+    """The shard holding a user's todos (see ``todo.routers``)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    shard = models.CharField(max_length=100)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.shard}'
@@ -0,0 +1,102 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import in_id_range
+
+
+def encode_cursor(todo, tier=0):
+    raw = f'{todo.edited.isoformat()}|{todo.id}' + (f'|{tier}' if tier else '')
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(edited, id, tier)`` stored in the cursor or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        edited, todo_id, *tier = raw.split('|')
+        edited, todo_id, tier = datetime.fromisoformat(edited), int(todo_id), int(tier[0]) if tier else 0
+    except (binascii.Error, UnicodeDecodeError, ValueError, IndexError):
+        return None
+    if not in_id_range(todo_id) or tier < 0:
+        return None
+    return edited, todo_id, tier
+
+
+class KeysetPage:
+    """Page of todos ordered by ``(-edited, -id)`` with cursors pointing to the neighbouring pages."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+def keyset_paginate(queryset, request, per_page=None):
+    """Return the page of ``queryset`` addressed by the ``after``/``before`` query params.
+
+    Rows are located with a range condition on ``(edited, id)`` instead of OFFSET,
+    so every page costs one index range scan no matter how deep it is.
+    """
+    return tiered_paginate([queryset], request, per_page)
+
+
+def tiered_paginate(querysets, request, per_page=None):
+    """Like ``keyset_paginate`` over the rows of ``querysets`` one after the other.
+
+    Each queryset (tier) is ordered on its own; cursors record the tier of
+    their row, and a page ending inside one tier is filled from the next, so
+    the later tiers are only read once the earlier ones are paged through.
+    """
+    per_page = per_page or settings.TODOS_PER_PAGE
+    tiers = len(querysets)
+    before = decode_cursor(request.GET.get('before'))
+    after = decode_cursor(request.GET.get('after'))
+    if before and before[2] >= tiers or after and after[2] >= tiers:
+        before = after = None
+
+    if before:
+        edited, todo_id, tier = before
+        newer = querysets[tier].filter(Q(edited__gte=edited), Q(edited__gt=edited) | Q(id__gt=todo_id))
+        rows = [(tier, row) for row in newer.order_by('edited', 'id')[:per_page + 1]]
+        # Fill up with the oldest rows of the tiers above.
+        for tier in range(tier - 1, -1, -1):
+            if len(rows) > per_page:
+                break
+            rows += [(tier, row) for row in querysets[tier].order_by('edited', 'id')[:per_page + 1 - len(rows)]]
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        return KeysetPage([row for _, row in rows],
+                          next_cursor=encode_cursor(rows[-1][1], rows[-1][0]) if rows else None,
+                          previous_cursor=encode_cursor(rows[0][1], rows[0][0]) if has_more else None)
+
+    start = after[2] if after else 0
+    older = querysets[start]
+    if after:
+        edited, todo_id, _ = after
+        older = older.filter(Q(edited__lte=edited), Q(edited__lt=edited) | Q(id__lt=todo_id))
+    rows = [(start, row) for row in older.order_by('-edited', '-id')[:per_page + 1]]
+    # Fill up with the newest rows of the tiers below.
+    for tier in range(start + 1, tiers):
+        if len(rows) > per_page:
+            break
+        rows += [(tier, row) for row in querysets[tier].order_by('-edited', '-id')[:per_page + 1 - len(rows)]]
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    return KeysetPage([row for _, row in rows],
+                      next_cursor=encode_cursor(rows[-1][1], rows[-1][0]) if has_more else None,
+                      previous_cursor=encode_cursor(rows[0][1], rows[0][0]) if after and rows else None)
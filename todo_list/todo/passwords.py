@@ -0,0 +1,127 @@
+"""Password hashing on a bounded thread pool, and counters limiting sign-in attempts.
+
+PBKDF2 takes tens of milliseconds of CPU per hash. Running it on the request
+workers lets a burst of sign-ins hold up every other page, so hashes run on
+at most ``TODO_HASH_WORKERS`` threads with ``TODO_HASH_QUEUE`` more waiting,
+and anything beyond that is refused with ``Overloaded`` instead of queueing.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.core.cache import cache
+
+
+class Overloaded(Exception):
+    """Raised when every hashing thread is busy and the queue is full."""
+
+
+def _lower_priority():
+    """Let request threads win the CPU over hashing threads (Linux schedules threads by their nice value)."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+
+class HashingPool:
+    def __init__(self, workers, queue):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='todo-hash',
+                                            initializer=_lower_priority)
+        self._slots = threading.BoundedSemaphore(workers + queue)
+
+    def submit(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise Overloaded
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, func, *args):
+        """Run ``func`` on the pool and wait for it on the calling thread."""
+        return self.submit(func, *args).result()
+
+    async def arun(self, func, *args):
+        """Run ``func`` on the pool without blocking the event loop or the ``sync_to_async`` thread."""
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(settings.TODO_HASH_WORKERS, settings.TODO_HASH_QUEUE)
+    return _pool
+
+
+def hash_password(password):
+    return get_pool().run(make_password, password)
+
+
+async def ahash_password(password):
+    return await get_pool().arun(make_password, password)
+
+
+def _verify(password, encoded):
+    """Return ``(valid, new_hash)``; new_hash is set when the stored hash uses outdated parameters."""
+    if encoded is None:
+        # Hash anyway so unknown usernames take as long as wrong passwords.
+        make_password(password)
+        return False, None
+    valid = check_password(password, encoded)
+    if valid and identify_hasher(encoded).must_update(encoded):
+        return True, make_password(password)
+    return valid, None
+
+
+def verify_password(user, password):
+    """Check the password of ``user`` (None for an unknown username) on the pool."""
+    return get_pool().run(_verify, password, user.password if user is not None else None)
+
+
+async def averify_password(user, password):
+    return await get_pool().arun(_verify, password, user.password if user is not None else None)
+
+
+def take_token(key, burst, rate):
+    """Allow ``key`` up to ``burst`` attempts in each window of ``burst / rate`` seconds.
+
+    Returns 0 when the attempt is allowed, otherwise the seconds until the
+    window ends. The count lives in a fixed window started with ``cache.add``
+    and bumped with ``cache.incr``, which the shared cache backends do
+    atomically, so concurrent attempts cannot all read the same unused allowance.
+    """
+    window = max(1, math.ceil(burst / rate))
+    now = time.time()
+    cache_key = f'todo:attempts:{key}:{int(now // window)}'
+    cache.add(cache_key, 0, window)
+    try:
+        attempts = cache.incr(cache_key)
+    except ValueError:
+        # Evicted between the add and the incr.
+        cache.add(cache_key, 1, window)
+        attempts = 1
+    return 0 if attempts <= burst else max(1, math.ceil(window - now % window))
+
+
+def attempt_wait(request, username):
+    """Take a token for the client address and one for the username, as limited by ``TODO_LOGIN_LIMITS``.
+
+    Returns 0 when both are allowed, otherwise the seconds until the client may try again.
+    """
+    limits = settings.TODO_LOGIN_LIMITS
+    return (take_token(f'ip:{request.META.get("REMOTE_ADDR")}', *limits['ip'])
+            or take_token(f'username:{username.lower()}', *limits['username']))
@@ -0,0 +1,79 @@
+"""cProfile dumps of single requests, written to ``TODO_PROFILE_DIR`` by ``ProfilingMiddleware``."""
+import io
+import pstats
+import random
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+DUMP_NAME_RE = re.compile(r'^[\w-]+\.(prof|txt)$')
+
+
+def profile_dir():
+    return Path(settings.TODO_PROFILE_DIR)
+
+
+def profile_requested(request):
+    return 'profile' in request.GET or bool(request.headers.get('X-Profile'))
+
+
+def should_profile(request):
+    """Profile when a staff user asks for it with ``?profile`` or ``X-Profile``, or when the request is sampled.
+
+    Only looks the user up when profiling was asked for.
+    """
+    if settings.TODO_PROFILE_SAMPLE_RATE and random.random() < settings.TODO_PROFILE_SAMPLE_RATE:
+        return True
+    return profile_requested(request) and request.user.is_staff
+
+
+def write_dump(profiler, request, seconds):
+    """Write ``<name>.prof`` and a ``<name>.txt`` summary of the top cumulative functions; return the name."""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-')[:60] or 'root'
+    name = f'{datetime.now().strftime("%Y%m%d-%H%M%S-%f")}-{slug}'
+    profiler.dump_stats(directory / f'{name}.prof')
+
+    summary = io.StringIO()
+    summary.write(f'{request.method} {request.get_full_path()} took {seconds * 1000:.1f} ms\n\n')
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(settings.TODO_PROFILE_TOP_FUNCTIONS)
+    (directory / f'{name}.txt').write_text(summary.getvalue())
+
+    rotate()
+    return name
+
+
+def list_dumps():
+    """Return ``(name, size, modified)`` of every dump, newest first (names start with the time)."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    dumps = []
+    for path in directory.glob('*.prof'):
+        stat = path.stat()
+        summary = path.with_suffix('.txt')
+        size = stat.st_size + (summary.stat().st_size if summary.exists() else 0)
+        dumps.append((path.stem, size, datetime.fromtimestamp(stat.st_mtime, timezone.utc)))
+    return sorted(dumps, reverse=True)
+
+
+def rotate():
+    """Delete the oldest dumps beyond ``TODO_PROFILE_MAX_FILES`` or ``TODO_PROFILE_MAX_BYTES``."""
+    dumps = list_dumps()
+    total = sum(size for _, size, _ in dumps)
+    while dumps and (len(dumps) > settings.TODO_PROFILE_MAX_FILES or total > settings.TODO_PROFILE_MAX_BYTES):
+        name, size, _ = dumps.pop()
+        for suffix in ('.prof', '.txt'):
+            (profile_dir() / f'{name}{suffix}').unlink(missing_ok=True)
+        total -= size
+
+
+def dump_path(filename):
+    """Return the path of a dump file or None if the name is not one of ours."""
+    if not DUMP_NAME_RE.match(filename):
+        return None
+    path = profile_dir() / filename
+    return path if path.is_file() else None
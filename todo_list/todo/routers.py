@@ -0,0 +1,104 @@
+"""Spread todos over ``TODO_SHARDS`` databases by author, with optional read replicas per shard.
+
+Every author is placed on one shard the first time their todos are accessed,
+by a stable hash of their id over the shards configured at that moment. The
+placement is stored as a ``ShardPlacement`` row in the default database, so
+adding shards later does not move anyone until ``rebalance_shards`` does.
+Users, sessions and placements live in the default database, which also keeps
+an empty todo table for the cascade deletes of users.
+"""
+import random
+import zlib
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+SHARDED_MODELS = {'todo', 'archivedtodo', 'todostats'}
+
+
+def todo_databases():
+    """Aliases of every database holding todos."""
+    return settings.TODO_SHARDS or [DEFAULT_DB_ALIAS]
+
+
+def home_shard(author_id):
+    """The shard an author is placed on by hashing, ignoring any stored placement."""
+    shards = settings.TODO_SHARDS
+    return shards[zlib.crc32(str(author_id).encode()) % len(shards)]
+
+
+def _placement_key(author_id):
+    return f'todo:shard:{author_id}'
+
+
+def shard_for(author_id):
+    """Alias of the database holding the todos of ``author_id`` (a user or an id)."""
+    if not settings.TODO_SHARDS:
+        return DEFAULT_DB_ALIAS
+    author_id = getattr(author_id, 'pk', author_id)
+    alias = cache.get(_placement_key(author_id))
+    if alias is None:
+        placement, _ = apps.get_model('todo', 'ShardPlacement').objects.get_or_create(
+            user_id=author_id, defaults={'shard': home_shard(author_id)})
+        alias = placement.shard
+        cache.set(_placement_key(author_id), alias, settings.TODO_CACHE_TIMEOUT)
+    return alias
+
+
+def place_author(author_id, alias):
+    """Record that the todos of ``author_id`` now live on ``alias``."""
+    apps.get_model('todo', 'ShardPlacement').objects.update_or_create(user_id=author_id, defaults={'shard': alias})
+    cache.set(_placement_key(author_id), alias, settings.TODO_CACHE_TIMEOUT)
+
+
+def read_db_for(author_id):
+    """A read replica of the author's shard when ``TODO_SHARD_REPLICAS`` lists any, else the shard itself."""
+    alias = shard_for(author_id)
+    replicas = settings.TODO_SHARD_REPLICAS.get(alias)
+    return random.choice(replicas) if replicas else alias
+
+
+class ShardRouter:
+    """Route todos to their author's shard; everything else stays in the default database.
+
+    Querysets carry no author, so reads go through ``Todo.objects.for_author()``;
+    saves and deletes of a todo are routed by its ``author_id``.
+    """
+
+    @staticmethod
+    def _db_for(model, **hints):
+        if not settings.TODO_SHARDS:
+            return None
+        if model._meta.model_name not in SHARDED_MODELS or model._meta.app_label != 'todo':
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        # Todos of a user (user.todo_set) and stats are routed by the user, a todo by its author.
+        return shard_for(getattr(instance, 'author_id', instance.pk))
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, **hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        sharded = {f'todo.{name}' for name in SHARDED_MODELS}
+        if settings.TODO_SHARDS and {obj1._meta.label_lower, obj2._meta.label_lower} & sharded:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        shards = settings.TODO_SHARDS
+        if not shards:
+            return None
+        replicas = {alias for aliases in settings.TODO_SHARD_REPLICAS.values() for alias in aliases}
+        if db in replicas:
+            return False
+        if db in shards:
+            # Data migrations of the todo app (model_name None) touch the todo table.
+            return app_label == 'todo' and (model_name is None or model_name in SHARDED_MODELS)
+        return None
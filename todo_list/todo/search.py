@@ -0,0 +1,69 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+from .models import MAX_ID, Todo
+from .routers import read_db_for, todo_databases
+
+FTS_TABLE = 'todo_todo_fts'
+
+SEARCH_SQL = f"""
+    SELECT todo_todo.* FROM {FTS_TABLE}
+    JOIN todo_todo ON todo_todo.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s AND todo_todo.author_id = %s AND NOT todo_todo.pending_delete
+    ORDER BY bm25({FTS_TABLE}, 10.0, 1.0, 0.0)
+    LIMIT %s OFFSET %s
+"""
+
+
+def fts_available(alias=None):
+    """The FTS5 index is created by migration 0004 on SQLite only."""
+    return connections[alias or todo_databases()[0]].vendor == 'sqlite'
+
+
+def fts_query(author_id, text):
+    """Build an FTS5 query matching every word of ``text`` as a prefix within the author's todos.
+
+    Words are quoted so FTS5 operators typed by the user are matched literally;
+    the author column filter lets FTS5 intersect posting lists instead of
+    ranking other users' matches.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    terms = ' '.join(f'"{word}"*' for word in words)
+    return f'author_id:"{author_id}" AND {{title description}}: ({terms})'
+
+
+def search_todos(author_id, text, page=1, per_page=20):
+    """Return ``(todos, has_next)`` for one page of the author's todos matching ``text``.
+
+    Matches are ranked with BM25, title hits weighing ten times description
+    hits. Falls back to ``icontains`` when the database has no FTS5 index.
+    """
+    offset = (page - 1) * per_page
+    if offset + per_page + 1 > MAX_ID:
+        # Past any match, and past what SQLite can bind as LIMIT and OFFSET.
+        return [], False
+    alias = read_db_for(author_id)
+    if fts_available(alias):
+        query = fts_query(author_id, text)
+        if query is None:
+            return [], False
+        todos = list(Todo.objects.using(alias).raw(SEARCH_SQL, [query, author_id, per_page + 1, offset]))
+    else:
+        words = text.split()
+        if not words:
+            return [], False
+        todos = Todo.objects.using(alias).filter(author_id=author_id)
+        for word in words:
+            todos = todos.filter(Q(title__icontains=word) | Q(description__icontains=word))
+        todos = list(todos.order_by('-edited', '-id')[offset:offset + per_page + 1])
+    return todos[:per_page], len(todos) > per_page
+
+
+def rebuild_index():
+    for alias in todo_databases():
+        with connections[alias].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
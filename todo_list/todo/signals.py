@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import forget_user, invalidate
+from .instrumentation import record_query
+from .models import ArchivedTodo, Todo, TodoStats
+from .routers import shard_for
+
+
+@receiver(post_save, sender=Todo)
+@receiver(post_delete, sender=Todo)
+def invalidate_author_cache(sender, instance, using, **kwargs):
+    # Only once the write is visible; a request reading before the commit would
+    # otherwise cache the old page under the new version.
+    author_id = instance.author_id
+    transaction.on_commit(lambda: invalidate(author_id), using=using)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(pre_delete, sender=get_user_model())
+def delete_sharded_todos(sender, instance, **kwargs):
+    # The cascade of a user delete only sees the default database.
+    if settings.TODO_SHARDS:
+        Todo.all_objects.for_author(instance).delete()
+        ArchivedTodo.objects.for_author(instance).delete()
+        TodoStats.objects.using(shard_for(instance)).filter(user_id=instance.pk).delete()
+
+
+@receiver(user_logged_in)
+def invalidate_signed_in_user_pages(sender, request, user, **kwargs):
+    # Signing in rotates the CSRF token, so pages kept by the browser must not get a 304.
+    invalidate(user.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    if settings.TODO_INSTRUMENTATION and record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,69 @@
+// Keeps the current todo list up to date with the events of todo.live, so a
+// todo changed in another tab or device shows up without reloading the page.
+(function () {
+    'use strict';
+
+    const script = document.currentScript;
+    const list = document.querySelector('[data-live-list]');
+    const template = document.getElementById('live-card');
+    if (!list || !template || !window.EventSource) {
+        return;
+    }
+    const firstPage = list.dataset.firstPage === 'true';
+
+    function remove(id) {
+        const card = list.querySelector('[data-todo-id="' + id + '"]');
+        if (card) {
+            card.remove();
+        }
+    }
+
+    // Edited todos move to the top, like new ones, because the list is ordered by last edit.
+    function save(event) {
+        remove(event.id);
+        if (event.completed || !firstPage) {
+            return;
+        }
+        const card = template.content.firstElementChild.cloneNode(true);
+        card.dataset.todoId = event.id;
+        card.querySelector('input[name="ids"]').value = event.id;
+        card.querySelectorAll('[href]').forEach(function (link) {
+            link.setAttribute('href', link.getAttribute('href').replace('/0/', '/' + event.id + '/'));
+        });
+        card.querySelectorAll('form').forEach(function (form) {
+            form.setAttribute('action', form.getAttribute('action').replace('/0/', '/' + event.id + '/'));
+        });
+        card.querySelector('[data-todo-title]').textContent = event.title;
+        const description = card.querySelector('[data-todo-description]');
+        if (event.description) {
+            description.textContent = event.description;
+        } else {
+            description.closest('a').remove();
+        }
+        const empty = list.querySelector('[data-live-empty]');
+        if (empty) {
+            empty.remove();
+        }
+        list.prepend(card);
+    }
+
+    const source = new EventSource(script.dataset.url);
+    let opened = false;
+    source.onopen = function () {
+        // Events sent while reconnecting are lost, so start over from the server's list.
+        if (opened) {
+            window.location.reload();
+        }
+        opened = true;
+    };
+    source.onmessage = function (message) {
+        const event = JSON.parse(message.data);
+        if (event.op === 'resync') {
+            window.location.reload();
+        } else if (event.op === 'saved') {
+            save(event);
+        } else {
+            remove(event.id);
+        }
+    };
+})();
@@ -0,0 +1,60 @@
+"""Per-user numbers of current and completed todos, shown in the navbar.
+
+Counting on every page would cost two aggregates over the user's todos, so
+``TodoStats`` rows are kept up to date instead: every write path calls
+``adjust()`` in the transaction of the todo write, which changes the row with
+a single ``UPDATE ... SET count = count + n`` and so cannot lose concurrent
+updates. Rows are created by ``recount()`` when first needed, and the
+``recount_todos`` command repairs drift from writes that bypass ``adjust()``
+(raw SQL).
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .cache import get_or_compute
+from .models import ArchivedTodo, Todo, TodoStats
+from .routers import shard_for
+
+
+def adjust(author_id, current=0, completed=0):
+    """Add ``current`` and ``completed`` to the author's counts; call in the transaction of the todo write."""
+    updated = TodoStats.objects.using(shard_for(author_id)).filter(user_id=author_id).update(
+        current_count=F('current_count') + current, completed_count=F('completed_count') + completed)
+    if not updated:
+        # Counted after the write, so the new row already includes it.
+        recount(author_id)
+
+
+def count_todos(todos, archived_todos):
+    """Return ``{author_id: (current, completed)}`` with one aggregate over each of the querysets.
+
+    Archived todos count as completed.
+    """
+    rows = todos.order_by().values('author_id').annotate(
+        current=Count('id', filter=Q(completed__isnull=True)),
+        completed=Count('id', filter=Q(completed__isnull=False)),
+    )
+    counts = {row['author_id']: (row['current'], row['completed']) for row in rows}
+    for row in archived_todos.order_by().values('author_id').annotate(archived=Count('id')):
+        current, completed = counts.get(row['author_id'], (0, 0))
+        counts[row['author_id']] = (current, completed + row['archived'])
+    return counts
+
+
+def recount(author_id):
+    """Store the counts of the author's todos as they are now and return the stats."""
+    alias = shard_for(author_id)
+    with transaction.atomic(using=alias):
+        counts = count_todos(Todo.objects.for_author(author_id), ArchivedTodo.objects.for_author(author_id))
+        current, completed = counts.get(author_id, (0, 0))
+        stats, _ = TodoStats.objects.using(alias).update_or_create(
+            user_id=author_id, defaults={'current_count': current, 'completed_count': completed})
+    return stats
+
+
+def get_stats(user):
+    """Return ``{'current': n, 'completed': n}`` for the user, cached until their todos change."""
+    def load():
+        stats = TodoStats.objects.using(shard_for(user)).filter(user_id=user.id).first() or recount(user.id)
+        return {'current': stats.current_count, 'completed': stats.completed_count}
+    return get_or_compute(user.id, 'stats', load)
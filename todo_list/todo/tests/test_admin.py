@@ -0,0 +1,111 @@
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from todo.admin import CappedCountPaginator
+from todo.models import Todo, TodoStats
+from todo.stats import recount
+
+User = get_user_model()
+
+
+@skipIf(settings.TODO_SHARDS, 'The todo admin only lists the todos of the default database.')
+class TodoAdminTests(TestCase):
+    """Tests for the todo admin"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username='Admin', password='x')
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.users = [User.objects.create_user(username=f'User{i}') for i in range(3)]
+        Todo.objects.bulk_create([Todo(title=f'Todo {i}', author=self.users[i % 3]) for i in range(30)])
+        for user in self.users:
+            recount(user.id)
+        self.changelist = reverse('admin:todo_todo_changelist')
+
+    def test_changelist_queries_do_not_depend_on_rows(self):
+        # The capped count, the todos joined with their authors and the password the cached
+        # user leaves out, for the change password link; session and user are cached.
+        self.client.get(self.changelist)
+        with self.assertNumQueries(3):
+            self.client.get(self.changelist)
+        Todo.objects.bulk_create([Todo(title=f'More {i}', author=self.users[0]) for i in range(30)])
+        with self.assertNumQueries(3):
+            response = self.client.get(self.changelist)
+        self.assertContains(response, '60 todos')
+
+    def test_count_is_capped(self):
+        with mock.patch.object(CappedCountPaginator, 'limit', 10):
+            response = self.client.get(self.changelist)
+        self.assertContains(response, 'More than 10 todos')
+
+    def test_filters(self):
+        Todo.objects.filter(author=self.users[0]).complete()
+        response = self.client.get(self.changelist, {'completed__isnull': 'True'})
+        self.assertEqual(20, response.context['cl'].result_count)
+        response = self.client.get(self.changelist, {'completed__isnull': 'False'})
+        self.assertEqual(10, response.context['cl'].result_count)
+
+    def test_complete_and_reopen_actions_keep_counts(self):
+        ids = list(Todo.objects.filter(author=self.users[0]).values_list('id', flat=True)[:4])
+        self.client.post(self.changelist, {'action': 'complete_selected', '_selected_action': ids})
+        self.assertEqual(4, Todo.objects.filter(completed__isnull=False).count())
+        stats = TodoStats.objects.get(user=self.users[0])
+        self.assertEqual((6, 4), (stats.current_count, stats.completed_count))
+
+        self.client.post(self.changelist, {'action': 'reopen_selected', '_selected_action': ids[:1]})
+        stats.refresh_from_db()
+        self.assertEqual((7, 3), (stats.current_count, stats.completed_count))
+
+    def test_delete_selected_keeps_counts_and_cached_pages(self):
+        user_client = Client()
+        user_client.force_login(self.users[0])
+        todos = Todo.objects.filter(author=self.users[0]).order_by('id')
+        Todo.objects.filter(pk=todos[0].pk).complete()
+        recount(self.users[0].id)
+        ids = list(todos.values_list('id', flat=True)[:3])
+        # The first response sets the CSRF cookie pages are cached under; the second is cached.
+        user_client.get(reverse('current_todos'))
+        user_client.get(reverse('current_todos'))
+        self.client.post(self.changelist, {'action': 'delete_selected', '_selected_action': ids, 'post': 'yes'})
+        stats = TodoStats.objects.get(user=self.users[0])
+        self.assertEqual((7, 0), (stats.current_count, stats.completed_count))
+        response = user_client.get(reverse('current_todos'))
+        self.assertNotContains(response, f'data-todo-id="{ids[1]}"')
+
+    def test_delete_from_change_page_keeps_counts(self):
+        todo = Todo.objects.filter(author=self.users[0]).first()
+        self.client.post(reverse('admin:todo_todo_delete', args=[todo.id]), {'post': 'yes'})
+        self.assertFalse(Todo.objects.filter(pk=todo.pk).exists())
+        stats = TodoStats.objects.get(user=self.users[0])
+        self.assertEqual((9, 0), (stats.current_count, stats.completed_count))
+
+    def test_change_form_keeps_counts(self):
+        todo = Todo.objects.filter(author=self.users[0]).first()
+        url = reverse('admin:todo_todo_change', args=[todo.id])
+        data = {'title': todo.title, 'description': '', 'author': self.users[0].id,
+                'completed_0': '2024-01-01', 'completed_1': '12:00:00'}
+        self.client.post(url, data)
+        stats = TodoStats.objects.get(user=self.users[0])
+        self.assertEqual((9, 1), (stats.current_count, stats.completed_count))
+
+        self.client.post(url, dict(data, author=self.users[1].id))
+        self.assertEqual((9, 0), TodoStats.objects.values_list('current_count', 'completed_count').get(
+            user=self.users[0]))
+        self.assertEqual((10, 1), TodoStats.objects.values_list('current_count', 'completed_count').get(
+            user=self.users[1]))
+
+        self.client.post(url, dict(data, author=self.users[1].id, completed_0='', completed_1=''))
+        stats = TodoStats.objects.get(user=self.users[1])
+        self.assertEqual((11, 0), (stats.current_count, stats.completed_count))
+
+    def test_change_form_does_not_list_users(self):
+        todo = Todo.objects.first()
+        response = self.client.get(reverse('admin:todo_todo_change', args=[todo.id]))
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, f'>{self.users[2].username}</option>')
@@ -0,0 +1,91 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from todo.models import Todo
+from todo.stats import recount
+from todo.tests.utils import capture_queries
+
+User = get_user_model()
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class TodoBulkApiTests(TestCase):
+    """Tests for the bulk JSON API"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='User1')
+        self.user2 = User.objects.create_user(username='User2')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.todos = [Todo.objects.create(title=f'Todo {i}', author=self.user)
+                      for i in range(3)]
+        self.foreign_todo = Todo.objects.create(title='Other', author=self.user2)
+        recount(self.user.id)
+
+    def post(self, name, data, client=None):
+        return (client or self.authorized_client).post(
+            reverse(name), json.dumps(data), content_type='application/json')
+
+    def test_anonymous_user_gets_401(self):
+        response = self.post('api_bulk_complete', {'ids': []},
+                             client=self.guest_client)
+        self.assertEqual(401, response.status_code)
+
+    def test_malformed_body_rejected(self):
+        response = self.post('api_bulk_create', {'todos': 'not a list'})
+        self.assertEqual(400, response.status_code)
+
+    def test_bulk_create_reports_invalid_items(self):
+        response = self.post('api_bulk_create', {'todos': [
+            {'title': 'First', 'description': 'text'},
+            {'title': 'A' * 200},
+            {'title': 'Second'},
+        ]})
+        data = response.json()
+        self.assertEqual(2, data['created'])
+        self.assertEqual(['created', 'invalid', 'created'],
+                         [item['status'] for item in data['results']])
+        self.assertIn('title', data['results'][1]['errors'])
+        self.assertEqual(2, Todo.objects.for_author(self.user).filter(
+            title__in=['First', 'Second']).count())
+
+    def test_bulk_create_query_count_is_constant(self):
+        with capture_queries() as captured:
+            self.post('api_bulk_create',
+                      {'todos': [{'title': f'New {i}'} for i in range(50)]})
+        self.assertEqual(5, len(captured))
+
+    def test_bulk_complete_scoped_to_author(self):
+        ids = [todo.id for todo in self.todos[:2]]
+        response = self.post('api_bulk_complete',
+                             {'ids': ids + [self.foreign_todo.id, 'x', [1], 10 ** 30]})
+        data = response.json()
+        self.assertEqual(2, data['completed'])
+        self.assertEqual(['completed', 'completed', 'not_found', 'invalid',
+                          'invalid', 'invalid'],
+                         [item['status'] for item in data['results']])
+        self.assertEqual(2, Todo.objects.for_author(self.user).filter(
+            completed__isnull=False).count())
+        self.assertIsNone(Todo.objects.for_author(self.user2).get(pk=self.foreign_todo.id).completed)
+
+    def test_bulk_complete_skips_completed_todos(self):
+        self.post('api_bulk_complete', {'ids': [self.todos[0].id]})
+        response = self.post('api_bulk_complete', {'ids': [self.todos[0].id]})
+        self.assertEqual('already_completed',
+                         response.json()['results'][0]['status'])
+
+    def test_bulk_delete_scoped_to_author(self):
+        response = self.post('api_bulk_delete',
+                             {'ids': [self.todos[0].id, self.foreign_todo.id, 2 ** 63]})
+        data = response.json()
+        self.assertEqual(1, data['deleted'])
+        self.assertEqual(['deleted', 'not_found', 'invalid'],
+                         [item['status'] for item in data['results']])
+        self.assertTrue(Todo.objects.for_author(self.user2).filter(pk=self.foreign_todo.id).exists())
+        self.assertFalse(Todo.objects.for_author(self.user).filter(pk=self.todos[0].id).exists())
@@ -0,0 +1,109 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from todo.models import ArchivedTodo, Todo
+from todo.stats import get_stats
+
+User = get_user_model()
+
+
+@override_settings(TODOS_PER_PAGE=2)
+class TodoArchiveTests(TestCase):
+    """Tests for archiving and restoring todos"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='User1')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        now = timezone.now()
+        self.current = Todo.objects.create(title='Current', author=self.user)
+        # Old todos are edited earlier, so they come last in the completed list.
+        self.old = [Todo.objects.create(title=f'Old {i}', author=self.user, completed=now - timedelta(days=400))
+                    for i in range(3)]
+        self.recent = [Todo.objects.create(title=f'Recent {i}', author=self.user, completed=now)
+                       for i in range(2)]
+        Todo.objects.for_author(self.user).filter(pk__in=[todo.pk for todo in self.old]).update(edited=now - timedelta(days=400))
+
+    def archive(self, **options):
+        out = StringIO()
+        call_command('archive_todos', older_than=365, stdout=out, **options)
+        return out.getvalue()
+
+    def test_archive_moves_old_completed_todos(self):
+        stats = get_stats(self.user)
+        self.assertIn('Archived 3 todos', self.archive(batch_size=2))
+        self.assertEqual(['Current', 'Recent 0', 'Recent 1'], sorted(Todo.objects.for_author(self.user).values_list('title', flat=True)))
+        self.assertEqual(3, ArchivedTodo.objects.for_author(self.user).count())
+        self.assertEqual(stats, get_stats(self.user))
+
+    def test_archive_of_other_user_leaves_todos(self):
+        User.objects.create_user(username='User2')
+        self.assertIn('Archived 0 todos', self.archive(user='User2'))
+
+    def test_completed_list_pages_into_archive(self):
+        self.archive()
+        seen, pages = [], []
+        response = self.authorized_client.get(reverse('completed_todos'))
+        while True:
+            page = response.context['page']
+            pages.append(page)
+            seen.extend(todo.title for todo in page)
+            if not page.next_cursor:
+                break
+            response = self.authorized_client.get(reverse('completed_todos'), {'after': page.next_cursor})
+        self.assertEqual(['Recent 1', 'Recent 0', 'Old 2', 'Old 1', 'Old 0'], seen)
+        self.assertContains(response, reverse('view_archived_todo', kwargs={'todo_id': page[0].id}))
+
+        # Back from the page mixing both tables.
+        response = self.authorized_client.get(reverse('completed_todos'), {'before': pages[2].previous_cursor})
+        self.assertEqual(['Old 2', 'Old 1'], [todo.title for todo in response.context['page']])
+        response = self.authorized_client.get(reverse('completed_todos'), {'before': pages[1].previous_cursor})
+        self.assertEqual(['Recent 1', 'Recent 0'], [todo.title for todo in response.context['page']])
+        self.assertIsNone(response.context['page'].previous_cursor)
+
+    def test_current_list_ignores_archive(self):
+        self.archive()
+        response = self.authorized_client.get(reverse('current_todos'))
+        self.assertEqual(['Current'], [todo.title for todo in response.context['page']])
+
+    def test_restore_view_moves_todo_back(self):
+        self.archive()
+        archived = ArchivedTodo.objects.for_author(self.user).get(title='Old 0')
+        url = reverse('view_archived_todo', kwargs={'todo_id': archived.id})
+        self.assertContains(self.authorized_client.get(url), 'Restore from archive')
+        restore_url = reverse('restore_todo', kwargs={'todo_id': archived.id})
+        self.assertEqual(405, self.authorized_client.get(restore_url).status_code)
+
+        response = self.authorized_client.post(restore_url)
+        todo = Todo.objects.for_author(self.user).get(title='Old 0')
+        self.assertRedirects(response, reverse('view_todo', kwargs={'todo_id': todo.id}))
+        self.assertEqual(archived.edited, todo.edited)
+        self.assertEqual(archived.completed, todo.completed)
+        self.assertFalse(ArchivedTodo.objects.for_author(self.user).filter(pk=archived.pk).exists())
+        self.assertEqual(404, self.authorized_client.get(url).status_code)
+
+    def test_archived_todos_of_other_users_not_found(self):
+        self.archive()
+        archived = ArchivedTodo.objects.for_author(self.user).first()
+        other = Client()
+        other.force_login(User.objects.create_user(username='User2'))
+        self.assertEqual(404, other.get(reverse('view_archived_todo', kwargs={'todo_id': archived.id})).status_code)
+        self.assertEqual(404, other.post(reverse('restore_todo', kwargs={'todo_id': archived.id})).status_code)
+
+    def test_restore_command(self):
+        self.archive()
+        out = StringIO()
+        call_command('restore_todos', user='User1', batch_size=2, stdout=out)
+        self.assertIn('Restored 3 todos', out.getvalue())
+        self.assertFalse(ArchivedTodo.objects.for_author(self.user).exists())
+        self.assertEqual(6, Todo.objects.for_author(self.user).count())
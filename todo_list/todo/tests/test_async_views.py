@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase, AsyncRequestFactory
+
+from todo import async_views
+from todo.models import Todo
+
+User = get_user_model()
+
+
+class AsyncViewsTests(TestCase):
+    """Tests for the async read views"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.user = User.objects.create_user(username='User1')
+        self.user2 = User.objects.create_user(username='User2')
+        self.todo = Todo.objects.create(title='Test title',
+                                        description='Test description',
+                                        author=self.user)
+
+    def get(self, path, user):
+        request = self.factory.get(path)
+        request.user = user
+        return request
+
+    async def test_anonymous_user_redirected_to_sign_in(self):
+        response = await async_views.current_todos(
+            self.get('/todos/current/', AnonymousUser()))
+        self.assertEqual(302, response.status_code)
+        self.assertEqual('/todos/sign_in/?next=/todos/current/', response.url)
+
+    async def test_index_redirects_authenticated_user(self):
+        response = await async_views.index(self.get('/todos/', self.user))
+        self.assertEqual('/todos/current/', response.url)
+
+    async def test_current_todos_lists_own_todos(self):
+        response = await async_views.current_todos(
+            self.get('/todos/current/', self.user))
+        self.assertContains(response, 'Test title')
+        self.assertTrue(response.has_header('ETag'))
+
+    async def test_completed_todos_not_modified(self):
+        response = await async_views.completed_todos(
+            self.get('/todos/completed/', self.user))
+        request = self.get('/todos/completed/', self.user)
+        request.META['HTTP_IF_NONE_MATCH'] = response['ETag']
+        response = await async_views.completed_todos(request)
+        self.assertEqual(304, response.status_code)
+
+    async def test_view_todo_of_other_user_not_found(self):
+        with self.assertRaises(Http404):
+            await async_views.view_todo(
+                self.get(f'/todos/{self.todo.id}/', self.user2),
+                todo_id=self.todo.id)
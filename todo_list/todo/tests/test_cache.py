@@ -0,0 +1,131 @@
+import pickle
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from todo.cache import get_version
+from todo.models import Todo
+from todo.routers import shard_for
+from todo.tests.utils import capture_queries
+
+User = get_user_model()
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class TodoPageCacheTests(TestCase):
+    """Tests for the per-user page cache"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='User1')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.todo = Todo.objects.create(title='Test title',
+                                        description='Test description',
+                                        author=self.user)
+        # The first response sets the CSRF cookie pages are cached under.
+        self.authorized_client.get(reverse('current_todos'))
+
+    def test_cached_list_skips_todo_query(self):
+        """Warm list page comes from the cache with the session and the user."""
+        self.authorized_client.get(reverse('current_todos'))
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(reverse('current_todos'))
+        self.assertContains(response, 'Test title')
+
+    def test_cached_todo_page_skips_todo_query(self):
+        url = reverse('view_todo', kwargs={'todo_id': self.todo.id})
+        self.authorized_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(url)
+        self.assertContains(response, 'Test description')
+
+    def test_save_invalidates_cached_pages(self):
+        self.authorized_client.get(reverse('current_todos'))
+        self.todo.title = 'Changed title'
+        with self.captureOnCommitCallbacks(using=shard_for(self.user), execute=True):
+            self.todo.save()
+        response = self.authorized_client.get(reverse('current_todos'))
+        self.assertContains(response, 'Changed title')
+
+    def test_pages_invalidated_only_once_the_write_commits(self):
+        version = get_version(self.user.id)
+        with self.captureOnCommitCallbacks(using=shard_for(self.user)) as callbacks:
+            self.todo.save()
+            self.assertEqual(version, get_version(self.user.id))
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(version, get_version(self.user.id))
+
+    def test_complete_invalidates_cached_pages(self):
+        self.authorized_client.get(reverse('completed_todos'))
+        self.authorized_client.post(
+            reverse('complete_todo', kwargs={'todo_id': self.todo.id}))
+        response = self.authorized_client.get(reverse('completed_todos'))
+        self.assertContains(response, 'Test title')
+
+    def test_delete_invalidates_cached_pages(self):
+        url = reverse('view_todo', kwargs={'todo_id': self.todo.id})
+        self.authorized_client.get(url)
+        with self.captureOnCommitCallbacks(using=shard_for(self.user), execute=True):
+            self.authorized_client.post(
+                reverse('delete_todo', kwargs={'todo_id': self.todo.id}))
+        self.assertEqual(404, self.authorized_client.get(url).status_code)
+
+    def test_pages_not_shared_between_users(self):
+        other = User.objects.create_user(username='User2')
+        other_client = Client()
+        other_client.force_login(other)
+        other_client.get(reverse('current_todos'))
+        response = other_client.get(reverse('current_todos'))
+        self.assertNotContains(response, 'Test title')
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class CachedUserTests(TestCase):
+    """Tests for the cached request user"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='User1', password='Password1')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        Todo.objects.create(title='Test title', author=self.user)
+        self.authorized_client.get(reverse('current_todos'))
+
+    def test_uncached_page_makes_one_query(self):
+        """With the session, user and list validators cached only the page of todos is loaded."""
+        with capture_queries() as captured:
+            response = self.authorized_client.get(reverse('current_todos'), {'after': 'x'})
+        self.assertEqual(1, len(captured))
+        self.assertEqual(200, response.status_code)
+
+    def test_password_hash_not_cached(self):
+        self.assertNotIn(self.user.password.encode(), pickle.dumps(cache.get(f'todo:user:{self.user.id}')))
+        response = self.authorized_client.get(reverse('current_todos'), {'after': 'x'})
+        with capture_queries() as captured:
+            self.assertTrue(response.wsgi_request.user.check_password('Password1'))
+        self.assertEqual(1, len(captured))
+
+    def test_user_save_refreshes_cached_user(self):
+        self.user.first_name = 'Changed'
+        self.user.save()
+        response = self.authorized_client.get(reverse('current_todos'), {'after': 'x'})
+        self.assertEqual('Changed', response.wsgi_request.user.first_name)
+
+    def test_password_change_ends_other_sessions(self):
+        self.user.set_password('Password2')
+        self.user.save()
+        response = self.authorized_client.get(reverse('current_todos'))
+        self.assertRedirects(response, f"{reverse('sign_in')}?next={reverse('current_todos')}")
+
+    def test_sign_out_forgets_user(self):
+        self.authorized_client.post(reverse('sign_out'))
+        response = self.authorized_client.get(reverse('current_todos'))
+        self.assertEqual(302, response.status_code)
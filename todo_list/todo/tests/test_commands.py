@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase, TestCase
+
+from todo import urls
+from todo.models import ArchivedTodo, Todo
+from todo.tests.utils import count_everywhere
+
+User = get_user_model()
+
+
+class SeedTodosCommandTests(TestCase):
+    """Tests for the seed_todos command"""
+
+    databases = '__all__'
+
+    def test_seed_creates_users_and_todos(self):
+        call_command('seed_todos', users=3, todos_per_user=20, completed_ratio=0.5,
+                     batch_size=7, stdout=StringIO())
+        self.assertEqual(3, User.objects.filter(username__startswith='seed').count())
+        self.assertEqual(60, count_everywhere(Todo.objects.all()))
+        completed = count_everywhere(Todo.objects.filter(completed__isnull=False))
+        self.assertTrue(10 < completed < 50)
+        self.assertTrue(User.objects.get(username='seed0').check_password('password'))
+
+    def test_seed_is_reproducible(self):
+        call_command('seed_todos', users=1, todos_per_user=5, stdout=StringIO())
+        todos = Todo.objects.for_author(User.objects.get(username='seed0')).order_by('id')
+        first = list(todos.values_list('title', 'description'))
+        todos.delete()
+        call_command('seed_todos', users=1, todos_per_user=5, stdout=StringIO())
+        self.assertEqual(first, list(todos.values_list('title', 'description')))
+
+
+class BenchCommandTests(TestCase):
+    """Tests for the bench command"""
+
+    databases = '__all__'
+
+    def test_bench_reports_every_named_route(self):
+        call_command('seed_todos', users=1, todos_per_user=5, completed_ratio=0, stdout=StringIO())
+        out = StringIO()
+        call_command('bench', iterations=2, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual({pattern.name for pattern in urls.urlpatterns}, set(report['routes']))
+        for name, route in report['routes'].items():
+            with self.subTest(route=name):
+                self.assertIn(route['status'] // 100, (2, 3))
+        current = report['routes']['current_todos']
+        self.assertEqual(200, current['status'])
+        self.assertGreater(current['bytes'], 0)
+        self.assertLessEqual(current['p50_ms'], current['p99_ms'])
+        self.assertEqual(302, report['routes']['complete_todo']['status'])
+        self.assertEqual(5, count_everywhere(Todo.objects.filter(completed__isnull=True)))
+        self.assertEqual(0, count_everywhere(ArchivedTodo.objects.all()))
+        self.assertFalse(User.objects.get().is_staff)
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    """Tests for the loadtest command"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        user = User.objects.create_user(username='load0', password='password')
+        Todo.objects.bulk_create_by_author([Todo(title=f'Todo {i}', author=user) for i in range(20)])
+
+    def loadtest(self, output, **options):
+        out = StringIO()
+        call_command('loadtest', url=self.live_server_url, users=1, duration=2, ramp_up=0, think=0, prefix='load',
+                     output=output, stdout=out, **options)
+        with open(output) as file:
+            return json.load(file), out.getvalue()
+
+    def test_reports_every_journey(self):
+        with tempfile.TemporaryDirectory() as directory:
+            report, out = self.loadtest(os.path.join(directory, 'first.json'))
+            self.assertEqual(0, report['total']['errors'])
+            self.assertEqual(1, report['routes']['sign_in']['requests'])
+            self.assertLessEqual({'current_todos', 'view_todo', 'create_todo', 'complete_todo', 'delete_todo'},
+                                 set(report['routes']))
+            current = report['routes']['current_todos']
+            self.assertEqual({'200': current['requests']}, current['statuses'])
+            self.assertLessEqual(current['p50_ms'], current['p99_ms'])
+            self.assertIn('current_todos', out)
+
+            _, out = self.loadtest(os.path.join(directory, 'second.json'), mix='list=1',
+                                   compare=os.path.join(directory, 'first.json'))
+            self.assertRegex(out, r'current_todos .* p50 [+-]')
+
+    def test_unknown_journey(self):
+        with self.assertRaisesMessage(CommandError, 'Unknown journey "archive"'):
+            call_command('loadtest', mix='archive=1', stdout=StringIO())
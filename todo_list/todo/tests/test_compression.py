@@ -0,0 +1,66 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from todo.minify import minify_html
+from todo.models import Todo
+
+User = get_user_model()
+
+
+class MinifyHTMLTests(TestCase):
+    """Tests for HTML minification"""
+
+    databases = '__all__'
+
+    def test_indentation_removed(self):
+        self.assertEqual('<ul>\n<li>One</li>\n<li>Two</li>\n</ul>',
+                         minify_html('<ul>\n    <li>One</li>\n\n    <li>Two</li>\n</ul>'))
+
+    def test_preserved_elements(self):
+        html = '<div>\n  <textarea>\n  line\n</textarea>\n  <PRE class="x">a\n    b</PRE>\n</div>'
+        self.assertEqual('<div>\n<textarea>\n  line\n</textarea>\n<PRE class="x">a\n    b</PRE>\n</div>',
+                         minify_html(html))
+
+    def test_rendered_pages_are_minified(self):
+        user = User.objects.create_user(username='User1')
+        self.client.force_login(user)
+        todo = Todo.objects.create(title='Test title', description='Line one\n    indented', author=user)
+        self.assertNotIn('\n    <', self.client.get(reverse('current_todos')).content.decode())
+        response = self.client.get(reverse('edit_todo', kwargs={'todo_id': todo.id}))
+        self.assertContains(response, 'Line one\n    indented')
+
+
+class CompressionMiddlewareTests(TestCase):
+    """Tests for response compression"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='User1')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        Todo.objects.bulk_create_by_author([Todo(title=f'Todo {i}', author=self.user) for i in range(20)])
+
+    def test_large_page_gzipped(self):
+        response = self.authorized_client.get(reverse('current_todos'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertIn(b'Todo 19', gzip.decompress(response.content))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_not_compressed_without_accept_encoding(self):
+        response = self.authorized_client.get(reverse('current_todos'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(TODO_COMPRESS_MIN_LENGTH=10 ** 6)
+    def test_below_threshold_not_compressed(self):
+        response = self.authorized_client.get(reverse('current_todos'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_export_gzipped(self):
+        response = self.authorized_client.get(reverse('export_todos'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual('gzip', response['Content-Encoding'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(20, len(body.splitlines()))
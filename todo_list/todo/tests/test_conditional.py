@@ -0,0 +1,109 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from todo.models import Todo
+from todo.routers import shard_for
+
+User = get_user_model()
+
+
+class TodoConditionalGetTests(TestCase):
+    """Tests for conditional GETs of todo pages"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='User1')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.todo = Todo.objects.create(title='Test title',
+                                        description='Test description',
+                                        author=self.user)
+
+    def test_list_not_modified_for_matching_etag(self):
+        url = reverse('current_todos')
+        etag = self.authorized_client.get(url)['ETag']
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+
+    def test_list_not_modified_since_last_edit(self):
+        url = reverse('current_todos')
+        last_modified = self.authorized_client.get(url)['Last-Modified']
+        response = self.authorized_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(304, response.status_code)
+
+    def test_list_etag_changes_when_todo_leaves_list(self):
+        url = reverse('current_todos')
+        etag = self.authorized_client.get(url)['ETag']
+        self.authorized_client.post(
+            reverse('complete_todo', kwargs={'todo_id': self.todo.id}))
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertNotContains(response, 'Test title')
+
+    def test_list_modified_when_navbar_counts_change(self):
+        completed = Todo.objects.create(title='Done', author=self.user, completed=timezone.now())
+        url = reverse('current_todos')
+        first = self.authorized_client.get(url)
+        self.assertContains(first, 'Completed todos <span class="badge bg-secondary ms-2">1</span>')
+        with self.captureOnCommitCallbacks(using=shard_for(self.user), execute=True):
+            self.authorized_client.post(reverse('delete_todo', kwargs={'todo_id': completed.id}))
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertContains(response, 'Completed todos <span class="badge bg-secondary ms-2">0</span>')
+
+    def test_list_modified_after_signing_in_again(self):
+        """The kept page holds the CSRF token of the old session, which signing in rotates."""
+        def csrf_token(response):
+            return re.search(r'name="csrfmiddlewaretoken" value="(\w+)"', response.content.decode()).group(1)
+
+        self.user.set_password('Password1')
+        self.user.save()
+        browser = Client(enforce_csrf_checks=True)
+        sign_in = {'username': 'User1', 'password': 'Password1'}
+        form = browser.get(reverse('sign_in'))
+        browser.post(reverse('sign_in'), dict(sign_in, csrfmiddlewaretoken=csrf_token(form)))
+        url = reverse('current_todos')
+        first = browser.get(url)
+        response = browser.post(reverse('sign_out'), {'csrfmiddlewaretoken': csrf_token(first)})
+        self.assertEqual(302, response.status_code)
+        browser.post(reverse('sign_in'), dict(sign_in, csrfmiddlewaretoken=csrf_token(first)))
+        response = browser.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(200, response.status_code)
+        response = browser.post(reverse('complete_todo', kwargs={'todo_id': self.todo.id}),
+                                {'csrfmiddlewaretoken': csrf_token(response)})
+        self.assertEqual(302, response.status_code)
+
+    def test_lists_must_be_revalidated(self):
+        response = self.authorized_client.get(reverse('completed_todos'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_todo_not_modified_for_matching_etag(self):
+        url = reverse('view_todo', kwargs={'todo_id': self.todo.id})
+        etag = self.authorized_client.get(url)['ETag']
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+
+    def test_todo_modified_after_edit(self):
+        url = reverse('view_todo', kwargs={'todo_id': self.todo.id})
+        etag = self.authorized_client.get(url)['ETag']
+        self.todo.title = 'Changed title'
+        with self.captureOnCommitCallbacks(using=shard_for(self.user), execute=True):
+            self.todo.save()
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Changed title')
+
+    def test_etag_not_shared_between_users(self):
+        url = reverse('current_todos')
+        etag = self.authorized_client.get(url)['ETag']
+        other_client = Client()
+        other_client.force_login(User.objects.create_user(username='User2'))
+        response = other_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
@@ -0,0 +1,84 @@
+import json
+from io import StringIO
+from unittest import skipIf
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from todo.deletion import purge, request_account_deletion
+from todo.models import AccountDeletion, ArchivedTodo, Todo, TodoStats
+from todo.routers import shard_for
+
+User = get_user_model()
+
+
+class DeferredDeletionTests(TestCase):
+    """Tests for deferred todo deletion"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='User1')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.todos = [Todo.objects.create(title=f'Todo {i}', author=self.user) for i in range(5)]
+
+    def test_bulk_delete_hides_todos_until_purged(self):
+        ids = [todo.id for todo in self.todos[:3]]
+        self.authorized_client.post(reverse('api_bulk_delete'), json.dumps({'ids': ids}),
+                                    content_type='application/json')
+        self.assertEqual(2, Todo.objects.for_author(self.user).count())
+        self.assertEqual(3, Todo.all_objects.for_author(self.user).filter(pending_delete=True).count())
+        response = self.authorized_client.get(reverse('current_todos'))
+        self.assertEqual(['Todo 3', 'Todo 4'], sorted(todo.title for todo in response.context['page']))
+
+        stats = purge(batch_size=2, pause=0)
+        self.assertEqual((3, 2), (stats.rows, stats.batches))
+        self.assertEqual(2, Todo.all_objects.for_author(self.user).count())
+
+    def test_account_deletion_signs_out_then_purges(self):
+        ArchivedTodo.objects.create(title='Archived', author=self.user, edited='2024-01-01T00:00Z',
+                                    completed='2024-01-01T00:00Z')
+        other = User.objects.create_user(username='User2')
+        Todo.objects.create(title='Other', author=other)
+        request_account_deletion(self.user)
+        self.assertRedirects(self.authorized_client.get(reverse('current_todos')),
+                             reverse('sign_in') + '?next=' + reverse('current_todos'))
+
+        stats = purge(batch_size=2, pause=0)
+        self.assertEqual((6, 1), (stats.rows, stats.accounts))
+        self.assertEqual(4, stats.batches)
+        self.assertFalse(User.objects.filter(username='User1').exists())
+        self.assertFalse(AccountDeletion.objects.exists())
+        self.assertFalse(TodoStats.objects.using(shard_for(self.user.id)).filter(user_id=self.user.id).exists())
+        self.assertFalse(Todo.all_objects.for_author(self.user.id).exists())
+        self.assertEqual(['Other'], list(Todo.all_objects.for_author(other).values_list('title', flat=True)))
+
+    @skipIf(settings.TODO_SHARDS, 'The todo admin only lists the todos of the default database.')
+    def test_admin_deletes_are_deferred(self):
+        admin = User.objects.create_superuser(username='Admin', password='x')
+        client = Client()
+        client.force_login(admin)
+        client.post(reverse('admin:todo_todo_changelist'),
+                    {'action': 'delete_selected', '_selected_action': [self.todos[0].id], 'post': 'yes'})
+        self.assertTrue(Todo.all_objects.get(pk=self.todos[0].id).pending_delete)
+
+        response = client.get(reverse('admin:auth_user_delete', args=[self.user.id]))
+        self.assertContains(response, 'Users: 1')
+        client.post(reverse('admin:auth_user_delete', args=[self.user.id]), {'post': 'yes'})
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertTrue(AccountDeletion.objects.filter(user=self.user).exists())
+        self.assertEqual(5, Todo.all_objects.filter(author=self.user).count())
+
+    def test_purge_command(self):
+        request_account_deletion(self.user)
+        out = StringIO()
+        call_command('purge_deleted', batch_size=2, pause=0, measure=True, stdout=out)
+        self.assertIn('Purged 5 rows in 3 batches, 1 accounts', out.getvalue())
+        self.assertIn('Peak memory', out.getvalue())
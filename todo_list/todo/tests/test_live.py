@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from todo.live import RESYNC, LiveEventsApp, TooManyConnections, broker
+from todo.models import Todo
+from todo.routers import shard_for
+
+User = get_user_model()
+
+
+async def not_found_app(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 404, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+class Stream:
+    """One request to ``LiveEventsApp``, with the messages it sends."""
+
+    def __init__(self, cookies='', path=None):
+        self.received = asyncio.Queue()
+        self.sent = asyncio.Queue()
+        scope = {'type': 'http', 'method': 'GET', 'path': path or reverse('live_events'),
+                 'headers': [(b'cookie', cookies.encode())]}
+        self.task = asyncio.ensure_future(LiveEventsApp(not_found_app)(scope, self.received.get, self.sent.put))
+
+    async def next(self):
+        return await asyncio.wait_for(self.sent.get(), 5)
+
+    async def event(self):
+        return json.loads((await self.next())['body'].decode()[len('data: '):])
+
+    async def disconnect(self):
+        await self.received.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(self.task, 5)
+
+
+class LiveEventsTests(TestCase):
+    """Tests for live todo list updates"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='User1')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.cookies = f'{settings.SESSION_COOKIE_NAME}={self.authorized_client.session.session_key}'
+
+    def post(self, name, **kwargs):
+        with self.captureOnCommitCallbacks(using=shard_for(self.user), execute=True):
+            self.authorized_client.post(reverse(name, kwargs=kwargs), {'title': 'Live', 'description': ''})
+
+    async def open(self):
+        stream = Stream(self.cookies)
+        start = await stream.next()
+        self.assertEqual(200, start['status'])
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        self.assertTrue((await stream.next())['body'].startswith(b'retry:'))
+        return stream
+
+    async def test_views_publish_to_open_streams(self):
+        stream = await self.open()
+        await sync_to_async(self.post)('create_todo')
+        todo = await sync_to_async(Todo.objects.for_author(self.user).get)(title='Live')
+        self.assertEqual({'op': 'saved', 'id': todo.id, 'title': 'Live', 'description': '',
+                          'url': todo.get_absolute_url(), 'completed': False}, await stream.event())
+
+        await sync_to_async(self.post)('complete_todo', todo_id=todo.id)
+        self.assertEqual({'op': 'completed', 'id': todo.id}, await stream.event())
+        await sync_to_async(self.post)('delete_todo', todo_id=todo.id)
+        self.assertEqual({'op': 'deleted', 'id': todo.id}, await stream.event())
+
+        await stream.disconnect()
+        self.assertEqual(0, broker.connections())
+
+    async def test_anonymous_stream_refused(self):
+        stream = Stream()
+        self.assertEqual(403, (await stream.next())['status'])
+
+    async def test_other_paths_go_to_django(self):
+        stream = Stream(self.cookies, path='/todos/current/')
+        self.assertEqual(404, (await stream.next())['status'])
+
+    @override_settings(TODO_LIVE_MAX_PER_USER=1)
+    async def test_streams_per_user_limited(self):
+        stream = await self.open()
+        second = Stream(self.cookies)
+        start = await second.next()
+        self.assertEqual(503, start['status'])
+        await stream.disconnect()
+
+    @override_settings(TODO_LIVE_HEARTBEAT=0.01)
+    async def test_idle_stream_gets_heartbeats(self):
+        stream = await self.open()
+        self.assertEqual(b':\n\n', (await stream.next())['body'])
+        await stream.disconnect()
+
+    @override_settings(TODO_LIVE_QUEUE_SIZE=3)
+    async def test_slow_stream_gets_resync_instead_of_backlog(self):
+        subscription = broker.subscribe(self.user.id)
+        try:
+            for index in range(4):
+                broker.publish(self.user.id, {'op': 'deleted', 'id': index})
+            await asyncio.sleep(0)
+            self.assertEqual([RESYNC], [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())])
+        finally:
+            broker.unsubscribe(self.user.id, subscription)
+
+    @override_settings(TODO_LIVE_MAX_CONNECTIONS=1)
+    async def test_connections_per_process_limited(self):
+        subscription = broker.subscribe(self.user.id)
+        try:
+            with self.assertRaises(TooManyConnections):
+                broker.subscribe(self.user.id + 1)
+        finally:
+            broker.unsubscribe(self.user.id, subscription)
+
+    def test_list_loads_live_script(self):
+        response = self.authorized_client.get(reverse('current_todos'))
+        self.assertContains(response, 'data-url="/todos/live/"')
+        self.assertContains(response, 'id="live-card"')
+
+    def test_wsgi_endpoint_stops_reconnects(self):
+        self.assertEqual(204, self.authorized_client.get(reverse('live_events')).status_code)
@@ -0,0 +1,61 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, Client, override_settings
+from django.urls import reverse
+
+from todo.instrumentation import registry
+from todo.models import Todo
+from todo.stats import recount
+
+User = get_user_model()
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class InstrumentationMiddlewareTests(TestCase):
+    """Tests for request instrumentation"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.user = User.objects.create_user(username='User1')
+        self.staff = User.objects.create_user(username='Staff', is_staff=True)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        Todo.objects.create(title='Test title', author=self.user)
+        recount(self.user.id)
+
+    def test_server_timing_header(self):
+        response = self.authorized_client.get(reverse('current_todos'))
+        header = response['Server-Timing']
+        queries = int(re.search(r'desc="(\d+) queries"', header).group(1))
+        self.assertEqual(4, queries)
+        template_ms = float(re.search(r'tpl;dur=([\d.]+)', header).group(1))
+        self.assertGreater(template_ms, 0)
+        self.assertIn('total;dur=', header)
+
+    async def test_server_timing_counts_queries_of_async_requests(self):
+        # The ORM work of async requests runs in sync_to_async threads, not on the event loop.
+        client = AsyncClient()
+        client.cookies = self.authorized_client.cookies
+        response = await client.get(reverse('current_todos'))
+        queries = int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+        self.assertEqual(4, queries)
+
+    def test_metrics_for_staff_only(self):
+        self.assertEqual(403, self.authorized_client.get(reverse('metrics')).status_code)
+        self.assertEqual(200, self.staff_client.get(reverse('metrics')).status_code)
+
+    def test_metrics_histogram_per_view(self):
+        self.authorized_client.get(reverse('current_todos'))
+        self.authorized_client.get(reverse('current_todos'))
+        content = self.staff_client.get(reverse('metrics')).content.decode()
+        self.assertIn('todo_request_duration_seconds_bucket{view="current_todos",le="+Inf"} 2',
+                      content)
+        self.assertIn('todo_request_duration_seconds_count{view="current_todos"} 2', content)
+        self.assertIn('todo_db_queries_total{view="current_todos"}', content)
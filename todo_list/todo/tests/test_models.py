@@ -1,12 +1,17 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import Truncator
 
-from todo.models import Todo
+from todo.models import ArchivedTodo, Todo, TodoRow
 
 
 class TestTodo(TestCase):
     """Tests for Todo model"""
 
+    databases = '__all__'
+
     @classmethod
     def setUpTestData(cls):
         cls.todo = Todo.objects.create(title="Test title",
@@ -24,3 +29,41 @@ class TestTodo(TestCase):
     def test_absolute_url(self):
         url = self.todo.get_absolute_url()
         self.assertEqual('/todos/1/', url)
+
+
+class TestTodoRows(TestCase):
+    """Tests for the rows the todo lists are rendered from"""
+
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='rows')
+        cls.todo = Todo.objects.create(title='T' * 100, description='lorem ipsum ' * 400, author=cls.user)
+
+    def test_rows_fetch_only_the_start_of_the_text(self):
+        row = Todo.objects.for_author(self.user).filter(pk=self.todo.pk).rows().get()
+        self.assertIsInstance(row, TodoRow)
+        self.assertEqual((self.todo.id, 'T' * 51, self.todo.description[:101], self.todo.edited, None, None), row)
+
+    def test_archived_rows_keep_archived(self):
+        now = timezone.now()
+        archived = ArchivedTodo.objects.create(title='Old', edited=now, completed=now, author=self.user)
+        row = ArchivedTodo.objects.for_author(self.user).rows().get()
+        self.assertEqual((archived.id, 'Old', '', now, now, archived.archived), row)
+
+    def test_rows_truncate_like_the_full_text(self):
+        # Combining accents are not counted by truncatechars, so these prefixes need the full text.
+        texts = ['lorem ipsum ' * 20, 'e\u0301' * 150, 'e\u0301' * 50 + 'x' * 60, 'x' * 101, 'x' * 100]
+        for text in texts:
+            with self.subTest(text=text[:20]):
+                Todo.objects.for_author(self.user).filter(pk=self.todo.pk).update(title=text[:100], description=text)
+                row = Todo.objects.for_author(self.user).filter(pk=self.todo.pk).rows().get()
+                self.assertEqual(Truncator(text[:100]).chars(50), Truncator(row.title).chars(50))
+                self.assertEqual(Truncator(text).chars(100), Truncator(row.description).chars(100))
+
+    def test_lists_render_truncated_text(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('current_todos'))
+        self.assertContains(response, Truncator(self.todo.description).chars(100))
+        self.assertNotContains(response, self.todo.description[:101])
@@ -0,0 +1,157 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from urllib.parse import urlencode
+
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.signals import user_login_failed
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, Client, AsyncRequestFactory, override_settings
+from django.urls import reverse
+
+from todo import async_views
+from todo.passwords import HashingPool, Overloaded, take_token
+
+User = get_user_model()
+
+
+class HashingPoolTests(TestCase):
+    """Tests for the password hashing pool"""
+
+    def test_refuses_work_beyond_queue(self):
+        pool = HashingPool(workers=1, queue=1)
+        release = threading.Event()
+        futures = [pool.submit(release.wait), pool.submit(release.wait)]
+        with self.assertRaises(Overloaded):
+            pool.submit(release.wait)
+        release.set()
+        for future in futures:
+            future.result()
+        self.assertTrue(pool.run(lambda: True))
+
+    def test_token_bucket(self):
+        cache.clear()
+        self.assertEqual(0, take_token('test', 2, 0.001))
+        self.assertEqual(0, take_token('test', 2, 0.001))
+        self.assertTrue(0 < take_token('test', 2, 0.001) <= 2000)
+        self.assertEqual(0, take_token('other', 2, 0.001))
+
+    def test_token_bucket_under_concurrent_attempts(self):
+        cache.clear()
+        start = threading.Barrier(8)
+        get = LocMemCache.get
+
+        def slow_get(*args, **kwargs):
+            # Widen the gap between reading and writing the count.
+            value = get(*args, **kwargs)
+            time.sleep(0.01)
+            return value
+
+        def attempt(_):
+            start.wait()
+            return take_token('test', 3, 0.001)
+
+        with mock.patch.object(LocMemCache, 'get', slow_get), ThreadPoolExecutor(8) as executor:
+            waits = list(executor.map(attempt, range(8)))
+        self.assertEqual(3, waits.count(0))
+
+
+@override_settings(TODO_LOGIN_LIMITS={'ip': (20, 1.0), 'username': (2, 0.001)})
+class SignInLimitTests(TestCase):
+    """Tests for sign-in rate limits"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        # Leave no exhausted limits behind for other tests signing in from the same address.
+        self.addCleanup(cache.clear)
+        User.objects.create_user(username='User1', password='12345')
+        self.guest_client = Client()
+
+    def sign_in(self, password='wrong'):
+        return self.guest_client.post(reverse('sign_in'), {'username': 'User1', 'password': password})
+
+    def test_too_many_attempts_rejected_before_hashing(self):
+        # 500 seconds into a window of 2 attempts at 0.001 per second.
+        with mock.patch('todo.passwords.time') as clock:
+            clock.time.return_value = 2500.0
+            self.sign_in()
+            self.sign_in()
+            with mock.patch('todo.backends.auth.verify_password') as verify_password, \
+                    mock.patch('todo.backends.auth.averify_password') as averify_password:
+                response = self.sign_in('12345')
+        verify_password.assert_not_called()
+        averify_password.assert_not_called()
+        self.assertContains(response, 'please try again in 1500 seconds', status_code=429)
+        self.assertEqual('1500', response['Retry-After'])
+
+    def test_overloaded_pool_rejected(self):
+        with mock.patch('todo.backends.auth.verify_password', side_effect=Overloaded), \
+                mock.patch('todo.backends.auth.averify_password', side_effect=Overloaded):
+            response = self.sign_in('12345')
+        self.assertEqual(429, response.status_code)
+
+    def test_sign_up_limited_per_address(self):
+        with override_settings(TODO_LOGIN_LIMITS={'ip': (1, 0.001), 'username': (5, 0.001)}):
+            data = {'username': 'New_user', 'password1': 'password', 'password2': 'password'}
+            self.guest_client.post(reverse('sign_up'), data)
+            response = self.guest_client.post(reverse('sign_up'), dict(data, username='Other_user'))
+        self.assertEqual(429, response.status_code)
+        self.assertFalse(User.objects.filter(username='Other_user').exists())
+
+
+class AsyncSignInTests(TestCase):
+    """Tests for the async sign-in views"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        User.objects.create_user(username='User1', password='12345')
+
+    def post(self, path, data):
+        request = self.factory.post(path, urlencode(data), content_type='application/x-www-form-urlencoded')
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+        return request
+
+    async def test_sign_in(self):
+        request = self.post('/todos/sign_in/', {'username': 'User1', 'password': '12345'})
+        response = await async_views.sign_in(request)
+        self.assertEqual('/todos/current/', response.url)
+        self.assertEqual('User1', request.user.username)
+
+    async def test_sign_in_with_wrong_password(self):
+        response = await async_views.sign_in(
+            self.post('/todos/sign_in/', {'username': 'User1', 'password': 'wrong'}))
+        self.assertContains(response, 'Incorrect username and/or password')
+
+    async def test_failed_sign_in_signalled(self):
+        failures = []
+
+        def record(sender, credentials, **kwargs):
+            failures.append(credentials)
+
+        user_login_failed.connect(record)
+        self.addCleanup(user_login_failed.disconnect, record)
+        await async_views.sign_in(self.post('/todos/sign_in/', {'username': 'User1', 'password': 'wrong'}))
+        self.assertEqual([{'username': 'User1', 'password': '********************'}], failures)
+
+    @override_settings(AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'])
+    async def test_sign_in_uses_configured_backends(self):
+        request = self.post('/todos/sign_in/', {'username': 'User1', 'password': '12345'})
+        with mock.patch('todo.backends.auth.averify_password') as averify_password:
+            await async_views.sign_in(request)
+        averify_password.assert_not_called()
+        self.assertEqual('django.contrib.auth.backends.ModelBackend', request.session[BACKEND_SESSION_KEY])
+
+    async def test_sign_up(self):
+        request = self.post('/todos/sign_up/', {'username': 'New_user', 'password1': 'password',
+                                                'password2': 'password'})
+        response = await async_views.sign_up(request)
+        self.assertEqual('/todos/current/', response.url)
+        self.assertEqual('New_user', request.user.username)
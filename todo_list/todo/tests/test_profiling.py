@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from todo.profiling import list_dumps
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Tests for request profiling"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+        settings_override = override_settings(TODO_PROFILE_DIR=self.profile_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(username='User1')
+        self.staff = User.objects.create_user(username='Staff', is_staff=True)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_staff_request_is_profiled(self):
+        """A staff request with ?profile writes a .prof dump and a text summary"""
+        response = self.staff_client.get(reverse('current_todos'), {'profile': ''})
+        name = response['X-Profile-Dump']
+        self.assertEqual([name], [dump[0] for dump in list_dumps()])
+        summary = self.staff_client.get(reverse('profile_download', args=[f'{name}.txt']))
+        self.assertIn(b'cumulative', b''.join(summary.streaming_content))
+
+    def test_header_activates_profiling(self):
+        response = self.staff_client.get(reverse('current_todos'), HTTP_X_PROFILE='1')
+        self.assertIn('X-Profile-Dump', response)
+
+    def test_other_users_are_not_profiled(self):
+        response = self.authorized_client.get(reverse('current_todos'), {'profile': ''})
+        self.assertNotIn('X-Profile-Dump', response)
+        self.assertEqual([], list_dumps())
+
+    @override_settings(TODO_PROFILE_SAMPLE_RATE=1.0)
+    def test_sampled_requests_are_profiled(self):
+        response = self.authorized_client.get(reverse('current_todos'))
+        self.assertIn('X-Profile-Dump', response)
+
+    @override_settings(TODO_PROFILE_MAX_FILES=2)
+    def test_rotation_keeps_newest_dumps(self):
+        names = [self.staff_client.get(reverse('index'), {'profile': ''})['X-Profile-Dump'] for _ in range(3)]
+        self.assertEqual(2, len(list_dumps()))
+        self.assertNotIn(names[0], [dump[0] for dump in list_dumps()])
+
+    def test_listing_for_staff_only(self):
+        name = self.staff_client.get(reverse('index'), {'profile': ''})['X-Profile-Dump']
+        self.assertContains(self.staff_client.get(reverse('profile_list')), name)
+        self.assertEqual(302, self.authorized_client.get(reverse('profile_list')).status_code)
+        download = reverse('profile_download', args=[f'{name}.prof'])
+        self.assertEqual(302, self.authorized_client.get(download).status_code)
+
+    def test_download_rejects_other_files(self):
+        response = self.staff_client.get(reverse('profile_download', args=['..settings.py']))
+        self.assertEqual(404, response.status_code)
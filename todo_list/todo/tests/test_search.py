@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from todo.models import Todo
+from todo.routers import shard_for
+from todo.search import fts_query, search_todos
+
+User = get_user_model()
+
+
+class TodoSearchTests(TestCase):
+    """Tests for todo search"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='User1')
+        self.user2 = User.objects.create_user(username='User2')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.milk = Todo.objects.create(title='Buy milk',
+                                        description='From the store',
+                                        author=self.user)
+        self.way = Todo.objects.create(title='Read about space',
+                                       description='The milky way',
+                                       author=self.user)
+        self.foreign = Todo.objects.create(title='Buy milk too',
+                                           author=self.user2)
+
+    def test_prefix_match_ranks_title_first(self):
+        todos, has_next = search_todos(self.user.id, 'mil')
+        self.assertEqual([self.milk.id, self.way.id], [todo.id for todo in todos])
+        self.assertFalse(has_next)
+
+    def test_page_beyond_64_bits_is_empty(self):
+        self.assertEqual(([], False), search_todos(self.user.id, 'milk', page=10 ** 18))
+        response = self.authorized_client.get(reverse('search_todos'), {'q': 'milk', 'page': '9' * 25})
+        self.assertContains(response, 'Nothing found')
+
+    def test_search_scoped_to_author(self):
+        todos, _ = search_todos(self.user2.id, 'milk')
+        self.assertEqual([self.foreign.id], [todo.id for todo in todos])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.milk.title = 'Buy bread'
+        self.milk.save()
+        self.way.delete()
+        self.assertEqual([], search_todos(self.user.id, 'milk')[0])
+        self.assertEqual([self.milk.id],
+                         [todo.id for todo in search_todos(self.user.id, 'bread')[0]])
+
+    def test_operators_are_matched_literally(self):
+        self.assertEqual('author_id:"1" AND {title description}: ("milk"* "OR"*)',
+                         fts_query(1, 'milk OR'))
+        self.assertIsNone(fts_query(1, '"*()'))
+
+    def test_pagination(self):
+        todos, has_next = search_todos(self.user.id, 'milk', per_page=1)
+        self.assertTrue(has_next)
+        todos, has_next = search_todos(self.user.id, 'milk', page=2, per_page=1)
+        self.assertEqual([self.way.id], [todo.id for todo in todos])
+        self.assertFalse(has_next)
+
+    def test_search_page_renders_results(self):
+        response = self.authorized_client.get(reverse('search_todos'), {'q': 'milk'})
+        self.assertTemplateUsed(response, 'todo/search_results.html')
+        self.assertContains(response, 'Buy milk')
+        self.assertNotContains(response, 'Buy milk too')
+        # No bulk form on this page for the checkboxes to belong to.
+        self.assertNotContains(response, 'form="bulk-form"')
+
+    def test_rebuild_command_restores_index(self):
+        with connections[shard_for(self.user)].cursor() as cursor:
+            cursor.execute("INSERT INTO todo_todo_fts(todo_todo_fts) VALUES ('delete-all')")
+        self.assertEqual([], search_todos(self.user.id, 'milk')[0])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(2, len(search_todos(self.user.id, 'milk')[0]))
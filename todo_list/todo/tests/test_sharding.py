@@ -0,0 +1,150 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from todo.models import ArchivedTodo, ShardPlacement, Todo, TodoStats
+from todo.routers import ShardRouter, home_shard, place_author, read_db_for, shard_for
+from todo.stats import get_stats
+
+User = get_user_model()
+
+# No per-process state, like a cache shared with the web processes, as rebalance_shards requires.
+SHARED_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+@override_settings(TODO_SHARDS=['shard0', 'shard1'], TODO_SHARD_REPLICAS={'shard1': ['shard1_replica']})
+class ShardRouterTests(TestCase):
+    """Tests for the shard router"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='User1', password='password')
+        self.addCleanup(cache.clear)
+
+    def test_authors_are_placed_on_their_home_shard_once(self):
+        alias = shard_for(self.user)
+        self.assertEqual(home_shard(self.user.id), alias)
+        self.assertEqual(alias, ShardPlacement.objects.get(user=self.user).shard)
+        with self.assertNumQueries(0):
+            self.assertEqual(alias, shard_for(self.user.id))
+
+    def test_stored_placement_wins_over_the_hash(self):
+        place_author(self.user.id, 'shard1')
+        cache.clear()
+        with override_settings(TODO_SHARDS=['shard0', 'shard1', 'shard2']):
+            self.assertEqual('shard1', shard_for(self.user))
+
+    def test_reads_go_to_a_replica_of_the_shard(self):
+        place_author(self.user.id, 'shard1')
+        self.assertEqual('shard1_replica', read_db_for(self.user))
+        place_author(self.user.id, 'shard0')
+        self.assertEqual('shard0', read_db_for(self.user))
+
+    def test_todos_are_routed_by_author(self):
+        place_author(self.user.id, 'shard1')
+        router = ShardRouter()
+        self.assertEqual('shard1', router.db_for_write(Todo, instance=Todo(author_id=self.user.id)))
+        self.assertEqual('shard1', router.db_for_read(Todo, instance=self.user))
+        self.assertEqual(DEFAULT_DB_ALIAS, router.db_for_read(User, instance=self.user))
+        self.assertEqual(DEFAULT_DB_ALIAS, router.db_for_write(ShardPlacement))
+
+    def test_allow_migrate(self):
+        router = ShardRouter()
+        self.assertTrue(router.allow_migrate('shard0', 'todo', 'todo'))
+        self.assertFalse(router.allow_migrate('shard0', 'todo', 'shardplacement'))
+        self.assertFalse(router.allow_migrate('shard0', 'auth', 'user'))
+        self.assertFalse(router.allow_migrate('shard1_replica', 'todo', 'todo'))
+        self.assertIsNone(router.allow_migrate(DEFAULT_DB_ALIAS, 'todo', 'todo'))
+
+    def test_unsharded_everything_uses_the_default_database(self):
+        with override_settings(TODO_SHARDS=[]):
+            self.assertEqual(DEFAULT_DB_ALIAS, shard_for(self.user))
+            self.assertIsNone(ShardRouter().db_for_write(Todo, instance=Todo(author_id=self.user.id)))
+            self.assertIsNone(ShardRouter().allow_migrate('shard0', 'todo', 'todo'))
+        self.assertFalse(ShardPlacement.objects.exists())
+
+
+@skipUnless(settings.TODO_SHARDS, 'Run with SHARDS=2 to test against shard databases.')
+class ShardedTodoTests(TestCase):
+    """Tests for todos spread over shards"""
+
+    databases = {DEFAULT_DB_ALIAS, *settings.TODO_SHARDS}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='User1', password='password')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.addCleanup(cache.clear)
+
+    def create_todos(self, count):
+        for index in range(count):
+            self.client.post(reverse('create_todo'), {'title': f'Todo {index}', 'description': 'sharded'})
+        return list(Todo.objects.for_author(self.user).order_by('id'))
+
+    def other_shard(self):
+        return next(alias for alias in settings.TODO_SHARDS if alias != shard_for(self.user))
+
+    def test_todos_are_written_to_the_author_shard(self):
+        alias = shard_for(self.user)
+        todos = self.create_todos(3)
+        self.assertEqual(3, Todo.objects.using(alias).count())
+        self.assertFalse(Todo.objects.using(DEFAULT_DB_ALIAS).exists())
+        response = self.client.get(reverse('view_todo', kwargs={'todo_id': todos[0].id}))
+        self.assertContains(response, 'Todo 0')
+
+        response = self.client.get(reverse('current_todos'))
+        self.assertContains(response, 'Todo 2')
+        response = self.client.get(reverse('search_todos'), {'q': 'sharded'})
+        self.assertEqual(3, len(response.context['todos']))
+
+    def test_deleting_a_user_deletes_their_sharded_todos(self):
+        alias = shard_for(self.user)
+        self.create_todos(2)
+        self.user.delete()
+        self.assertFalse(Todo.objects.using(alias).exists())
+
+    def test_rebalance_refuses_a_per_process_cache(self):
+        with self.assertRaisesMessage(CommandError, 'local-memory cache is per process'):
+            call_command('rebalance_shards', user='User1', to=self.other_shard(), stdout=StringIO())
+        self.assertEqual(ShardPlacement.objects.get(user=self.user).shard, shard_for(self.user))
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_rebalance_moves_todos(self):
+        source, target = shard_for(self.user), self.other_shard()
+        todos = self.create_todos(5)
+        Todo.objects.using(source).filter(pk=todos[0].pk).update(completed=todos[0].edited)
+        ArchivedTodo.objects.using(source).create(author_id=self.user.id, title='Archived',
+                                                  edited=todos[0].edited, completed=todos[0].edited)
+        call_command('rebalance_shards', user='User1', to=target, batch_size=2, stdout=StringIO())
+
+        self.assertEqual(target, ShardPlacement.objects.get(user=self.user).shard)
+        self.assertFalse(Todo.objects.using(source).exists())
+        fields = ('title', 'description', 'edited', 'completed')
+        self.assertEqual([tuple(getattr(todo, field) for field in fields[:3]) for todo in todos[1:]],
+                         list(Todo.objects.using(target).filter(completed__isnull=True)
+                              .order_by('id').values_list(*fields[:3])))
+        self.assertEqual(1, Todo.objects.using(target).filter(completed__isnull=False).count())
+        self.assertEqual({'current': 4, 'completed': 2}, get_stats(self.user))
+        self.assertFalse(TodoStats.objects.using(source).exists())
+        self.assertFalse(ArchivedTodo.objects.using(source).exists())
+        self.assertEqual(['Archived'], list(ArchivedTodo.objects.using(target).values_list('title', flat=True)))
+
+        response = self.client.get(reverse('current_todos'))
+        self.assertContains(response, 'Todo 4')
+        response = self.client.get(reverse('search_todos'), {'q': 'sharded'})
+        self.assertEqual(5, len(response.context['todos']))
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_rebalance_all_moves_users_home(self):
+        home = shard_for(self.user)
+        place_author(self.user.id, self.other_shard())
+        self.create_todos(2)
+        call_command('rebalance_shards', all=True, stdout=StringIO())
+        self.assertEqual(home, shard_for(self.user))
+        self.assertEqual(2, Todo.objects.using(home).filter(author_id=self.user.id).count())
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import tempfile
+import threading
+
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase
+
+from todo.backends.sqlite3.base import DatabaseWrapper
+
+
+class TunedSQLiteBackendTests(SimpleTestCase):
+    """Tests for the tuned SQLite backend"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'db.sqlite3')
+        self.db = DatabaseWrapper({
+            **connection.settings_dict,
+            'ENGINE': 'todo.backends.sqlite3',
+            'NAME': self.path,
+            # Fail at once on a lock, so only the retries can wait for it.
+            'OPTIONS': {'pragmas': {'busy_timeout': 0}, 'lock_retries': 8},
+        }, alias='tuned')
+        self.addCleanup(self.db.close)
+        with self.db.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer PRIMARY KEY)')
+
+    def pragma(self, name):
+        with self.db.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        self.assertEqual('wal', self.pragma('journal_mode'))
+        self.assertEqual(1, self.pragma('synchronous'))
+        self.assertEqual(-20000, self.pragma('cache_size'))
+        self.assertEqual(1, self.pragma('foreign_keys'))
+
+    def lock_for(self, seconds):
+        other = sqlite3.connect(self.path, check_same_thread=False)
+        other.isolation_level = None
+        other.execute('BEGIN IMMEDIATE')
+        timer = threading.Timer(seconds, lambda: (other.execute('COMMIT'), other.close()))
+        timer.start()
+        self.addCleanup(timer.join)
+
+    def test_locked_statement_retried(self):
+        self.lock_for(0.05)
+        with self.db.cursor() as cursor:
+            cursor.execute('INSERT INTO item (id) VALUES (%s)', [1])
+            cursor.execute('SELECT count(*) FROM item')
+            self.assertEqual(1, cursor.fetchone()[0])
+
+    def test_no_retry_inside_atomic_block(self):
+        self.db.set_autocommit(False)
+        self.db.in_atomic_block = True
+        self.addCleanup(setattr, self.db, 'in_atomic_block', False)
+        self.lock_for(0.5)
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            with self.db.cursor() as cursor:
+                cursor.execute('INSERT INTO item (id) VALUES (%s)', [2])
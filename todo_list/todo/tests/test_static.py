@@ -0,0 +1,59 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from todo.middleware import accepted_encodings
+
+STATIC_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT, TODO_SERVE_STATIC=True,
+                   STATICFILES_STORAGE='todo.storage.CompressedManifestStaticFilesStorage')
+class StaticFilesTests(SimpleTestCase):
+    """Tests for static file storage"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT)
+        super().tearDownClass()
+
+    def test_collectstatic_writes_gzip_copies(self):
+        css = Path(STATIC_ROOT, 'todo', 'css')
+        self.assertTrue(list(css.glob('bootstrap.min.*.css.gz')))
+        # Too small to gain anything from compression.
+        self.assertFalse(list(css.glob('style*.gz')))
+
+    def test_pages_link_hashed_names(self):
+        response = self.client.get('/todos/sign_in/')
+        self.assertRegex(response.content.decode(), r'/static/todo/css/bootstrap\.min\.\w{12}\.css')
+
+    def test_hashed_file_served_compressed_and_immutable(self):
+        name = next(Path(STATIC_ROOT, 'todo', 'css').glob('bootstrap.min.*.css')).name
+        response = self.client.get(f'/static/todo/css/{name}', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertEqual('text/css', response['Content-Type'])
+        self.assertEqual('Accept-Encoding', response['Vary'])
+        self.assertIn('immutable', response['Cache-Control'])
+        body = b''.join(response.streaming_content)
+        self.assertEqual(Path(STATIC_ROOT, 'todo', 'css', name + '.gz').read_bytes(), body)
+
+    def test_uncompressed_without_accept_encoding(self):
+        response = self.client.get('/static/todo/css/bootstrap.min.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_unknown_file_falls_through(self):
+        self.assertEqual(404, self.client.get('/static/todo/css/missing.css').status_code)
+
+    def test_accepted_encodings(self):
+        self.assertEqual({'gzip', 'br'}, accepted_encodings('gzip, br;q=0.5, deflate;q=0'))
+        self.assertEqual(set(), accepted_encodings(''))
@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connections, transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from todo.models import Todo, TodoStats
+from todo.routers import shard_for
+from todo.stats import adjust, get_stats
+from todo.tests.utils import capture_queries
+
+User = get_user_model()
+
+
+def stored_counts(user):
+    stats = TodoStats.objects.using(shard_for(user)).get(user=user)
+    return stats.current_count, stats.completed_count
+
+
+class TodoStatsTests(TestCase):
+    """Tests for the todo counts"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='User1')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create(self, title):
+        with self.captureOnCommitCallbacks(using=shard_for(self.user), execute=True):
+            self.authorized_client.post(reverse('create_todo'), {'title': title})
+        return Todo.objects.for_author(self.user).get(title=title)
+
+    def test_views_keep_counts(self):
+        first, second = self.create('First'), self.create('Second')
+        self.assertEqual((2, 0), stored_counts(self.user))
+
+        self.authorized_client.post(reverse('complete_todo', kwargs={'todo_id': first.id}))
+        self.authorized_client.post(reverse('complete_todo', kwargs={'todo_id': first.id}))
+        self.assertEqual((1, 1), stored_counts(self.user))
+
+        self.authorized_client.post(reverse('delete_todo', kwargs={'todo_id': first.id}))
+        self.authorized_client.post(reverse('delete_todo', kwargs={'todo_id': second.id}))
+        self.assertEqual((0, 0), stored_counts(self.user))
+
+    def test_api_keeps_counts(self):
+        def post(name, data):
+            return self.authorized_client.post(reverse(name), json.dumps(data), content_type='application/json')
+
+        post('api_bulk_create', {'todos': [{'title': f'Todo {i}'} for i in range(5)]})
+        ids = list(Todo.objects.for_author(self.user).values_list('id', flat=True))
+        post('api_bulk_complete', {'ids': ids[:3]})
+        post('api_bulk_delete', {'ids': ids[1:4]})
+        self.assertEqual((1, 1), stored_counts(self.user))
+
+    def test_navbar_shows_counts(self):
+        self.create('First')
+        response = self.authorized_client.get(reverse('current_todos'))
+        self.assertEqual(1, response.context['todo_stats']['current'])
+        self.assertContains(response, '<span class="badge bg-secondary ms-2">1</span>', html=True)
+
+    def test_counts_are_cached_until_todos_change(self):
+        self.create('First')
+        self.assertEqual({'current': 1, 'completed': 0}, get_stats(self.user))
+        with capture_queries() as captured:
+            get_stats(self.user)
+        self.assertEqual(0, len(captured))
+        self.create('Second')
+        self.assertEqual({'current': 2, 'completed': 0}, get_stats(self.user))
+
+    def test_missing_stats_are_counted(self):
+        Todo.objects.create(title='Current', author=self.user)
+        Todo.objects.create(title='Done', author=self.user, completed='2024-01-01T00:00Z')
+        self.assertEqual({'current': 1, 'completed': 1}, get_stats(self.user))
+
+    def test_recount_command_fixes_drift(self):
+        self.create('First')
+        other = User.objects.create_user(username='User2')
+        TodoStats.objects.using(shard_for(other)).create(user=other, current_count=7)
+        Todo.objects.for_author(self.user).update(completed='2024-01-01T00:00Z')
+        out = StringIO()
+        call_command('recount_todos', stdout=out)
+        self.assertIn('Fixed the counts of 2 users', out.getvalue())
+        self.assertEqual((0, 1), stored_counts(self.user))
+        self.assertEqual((0, 0), stored_counts(other))
+        self.assertEqual({'current': 0, 'completed': 1}, get_stats(self.user))
+
+
+class ConcurrentStatsTests(TransactionTestCase):
+    """Tests for the todo counts under concurrent writes"""
+
+    databases = '__all__'
+
+    def test_concurrent_adjustments_are_not_lost(self):
+        user = User.objects.create_user(username='User1')
+        adjust(user.id, current=0)
+        errors = []
+
+        def adjust_with_retries(**counts):
+            # The shared in-memory test database fails on lock contention instead of waiting.
+            while True:
+                try:
+                    with transaction.atomic(using=shard_for(user)):
+                        adjust(user.id, **counts)
+                    return
+                except OperationalError as exc:
+                    if 'locked' not in str(exc):
+                        raise
+                    time.sleep(0.001)
+
+        def work():
+            try:
+                for _ in range(25):
+                    adjust_with_retries(current=1)
+                    adjust_with_retries(current=-1, completed=1)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual((0, 100), stored_counts(user))
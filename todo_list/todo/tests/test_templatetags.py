@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.template import Context, RequestContext, Template
+from django.test import TestCase, RequestFactory
+from django.urls import reverse, set_script_prefix, clear_script_prefix
+
+from todo.models import Todo
+
+User = get_user_model()
+
+
+class TodoUrlFilterTests(TestCase):
+    """Tests for the todo_url filter"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='User1')
+        self.todo = Todo.objects.create(title='Test title', author=self.user)
+
+    def render(self, source, **context):
+        return Template('{% load todo_tags %}' + source).render(Context(context))
+
+    def test_matches_reverse(self):
+        for view_name in ('view_todo', 'edit_todo', 'complete_todo', 'delete_todo'):
+            self.assertEqual(reverse(view_name, kwargs={'todo_id': self.todo.id}),
+                             self.render(f"{{{{ todo|todo_url:'{view_name}' }}}}", todo=self.todo))
+        self.assertEqual(self.todo.get_absolute_url(), self.render("{{ id|todo_url:'view_todo' }}", id=self.todo.id))
+
+    def test_script_prefix(self):
+        set_script_prefix('/app/')
+        self.addCleanup(clear_script_prefix)
+        self.assertEqual(f'/app/todos/{self.todo.id}/edit/', self.render("{{ todo|todo_url:'edit_todo' }}", todo=self.todo))
+
+    def test_csrf_input_matches_csrf_token(self):
+        request = RequestFactory().get('/')
+        template = Template('{% load todo_tags %}{% csrf_input as csrf_input %}{{ csrf_input }}|{% csrf_token %}')
+        first, second = template.render(RequestContext(request)).split('|')
+        self.assertEqual(first, second)
+        self.assertIn('csrfmiddlewaretoken', first)
+
+    def test_list_links(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('current_todos'))
+        self.assertContains(response, f'href="{self.todo.get_absolute_url()}"', count=1)
+        self.assertContains(response, f'action="{reverse("complete_todo", kwargs={"todo_id": self.todo.id})}"')
+        self.assertContains(response, 'src="/static/todo/img/pencil.svg"')
+        # Also in the bulk actions form and the placeholder card of live.js.
+        self.assertContains(response, 'name="csrfmiddlewaretoken"', count=4)
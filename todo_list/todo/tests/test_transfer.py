@@ -0,0 +1,123 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from todo.archive import archive_completed
+from todo.models import Todo, TodoStats, keep_edited
+from todo.routers import shard_for
+from todo.transfer import import_rows
+
+User = get_user_model()
+
+
+class TodoTransferTests(TestCase):
+    """Tests for exporting and importing todos"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='User1')
+        self.user2 = User.objects.create_user(username='User2')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.todo = Todo.objects.create(title='Test title',
+                                        description='Line one\nline, "two"',
+                                        author=self.user,
+                                        completed=timezone.now())
+        Todo.objects.create(title='Other title', author=self.user2)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def titles(self):
+        return sorted(title for user in (self.user, self.user2)
+                      for title in Todo.objects.for_author(user).values_list('title', flat=True))
+
+    def delete_todos(self):
+        for user in (self.user, self.user2):
+            Todo.objects.for_author(user).delete()
+
+    def round_trip(self, filename, **export_options):
+        path = os.path.join(self.tmp_dir.name, filename)
+        call_command('export_todos', output=path, **export_options)
+        self.delete_todos()
+        call_command('import_todos', path, batch_size=1, stdout=StringIO())
+        return path
+
+    def test_ndjson_round_trip_keeps_fields(self):
+        edited = Todo.objects.for_author(self.user).get(pk=self.todo.pk).edited
+        self.round_trip('todos.ndjson')
+        imported = Todo.objects.for_author(self.user).get(title='Test title')
+        self.assertEqual(self.todo.description, imported.description)
+        self.assertEqual(self.user, imported.author)
+        self.assertEqual(edited, imported.edited)
+        self.assertEqual(self.todo.completed, imported.completed)
+        self.assertEqual(['Other title', 'Test title'], self.titles())
+
+    def test_csv_round_trip_keeps_fields(self):
+        self.round_trip('todos.csv')
+        imported = Todo.objects.for_author(self.user).get(title='Test title')
+        self.assertEqual(self.todo.description, imported.description)
+        self.assertIsNone(Todo.objects.for_author(self.user2).get(title='Other title').completed)
+
+    def test_export_filtered_by_user(self):
+        path = self.round_trip('todos.ndjson', user='User2')
+        with open(path) as file:
+            self.assertEqual(['User2'], [json.loads(line)['author'] for line in file])
+        self.assertEqual(['Other title'], self.titles())
+
+    def test_import_skips_unknown_and_filtered_authors(self):
+        path = os.path.join(self.tmp_dir.name, 'todos.ndjson')
+        call_command('export_todos', output=path)
+        with open(path, 'a') as file:
+            file.write(json.dumps({'author': 'Nobody', 'title': 'Lost',
+                                   'edited': timezone.now().isoformat()}) + '\n')
+        self.delete_todos()
+        out = StringIO()
+        call_command('import_todos', path, user='User1', stdout=out)
+        self.assertIn('Imported 1 todos, skipped 2.', out.getvalue())
+        self.assertEqual(['Test title'], self.titles())
+
+    def test_failed_import_still_recounts(self):
+        rows = [{'author': 'User1', 'title': 'First', 'edited': timezone.now().isoformat()},
+                {'author': 'User1', 'edited': timezone.now().isoformat()}]
+        with self.assertRaises(KeyError):
+            import_rows(rows, batch_size=1)
+        stats = TodoStats.objects.using(shard_for(self.user)).get(user=self.user)
+        self.assertEqual((1, 1), (stats.current_count, stats.completed_count))
+
+    def test_export_includes_archived_todos(self):
+        archive_completed(shard_for(self.user), timezone.now() + timedelta(days=1))
+        self.assertFalse(Todo.objects.for_author(self.user).filter(title='Test title').exists())
+        response = self.authorized_client.get(reverse('export_todos'))
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(['Test title'], [row['title'] for row in rows])
+        self.assertIsNotNone(rows[0]['completed'])
+        self.round_trip('todos.ndjson')
+        self.assertEqual(['Other title', 'Test title'], self.titles())
+
+    def test_keep_edited_leaves_other_threads_alone(self):
+        old = timezone.now() - timedelta(days=1)
+        self.todo.edited = old
+        field = Todo._meta.get_field('edited')
+        with keep_edited(), ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(old, field.pre_save(self.todo, add=False))
+            self.todo.edited = old
+            self.assertGreater(executor.submit(field.pre_save, self.todo, False).result(), old)
+        self.assertGreater(field.pre_save(self.todo, add=False), old)
+
+    def test_http_export_streams_own_todos(self):
+        response = self.authorized_client.get(reverse('export_todos'), {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertEqual('attachment; filename="todos.csv"', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('Test title', content)
+        self.assertNotIn('Other title', content)
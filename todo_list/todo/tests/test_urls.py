@@ -7,6 +7,8 @@ User = get_user_model()
 
 
 class TodoURLsTests(TestCase):
+    databases = '__all__'
+
     def setUp(self):
         self.guest_client = Client()
         self.user = User.objects.create_user(username='User1')
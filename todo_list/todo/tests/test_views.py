@@ -1,14 +1,28 @@
+import base64
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from django.db.models import ObjectDoesNotExist
 
-from todo.models import Todo
+from todo.models import Todo, TodoStats
+from todo.routers import shard_for
+from todo.tests.utils import capture_queries
+from todo.stats import recount
 
 User = get_user_model()
 
 
+def encode_raw_cursor(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
 class TodoViewsTests(TestCase):
+    databases = '__all__'
+
     def setUp(self):
         self.guest_client = Client()
         self.user = User.objects.create_user(username='User1')
@@ -82,7 +96,7 @@ class TodoViewsTests(TestCase):
             reverse('edit_todo', kwargs={'todo_id': self.todo.id}),
             {'title': 'Changed title',
              'description': 'Changed text'})
-        edited_todo = Todo.objects.get(pk=self.todo.id)
+        edited_todo = Todo.objects.for_author(self.user).get(pk=self.todo.id)
         self.assertEqual('Changed title', edited_todo.title)
         self.assertEqual('Changed text', edited_todo.description)
         self.assertRedirects(response, reverse('current_todos'))
@@ -102,7 +116,7 @@ class TodoViewsTests(TestCase):
         """Test complete todo."""
         response = self.authorized_client.post(
             reverse('complete_todo', kwargs={'todo_id': self.todo.id}))
-        completed_todo = Todo.objects.get(pk=self.todo.id)
+        completed_todo = Todo.objects.for_author(self.user).get(pk=self.todo.id)
         self.assertTrue(completed_todo.completed)
         self.assertRedirects(response, reverse('current_todos'))
 
@@ -117,7 +131,7 @@ class TodoViewsTests(TestCase):
         self.authorized_client.post(
             reverse('delete_todo', kwargs={'todo_id': self.todo.id}))
         with self.assertRaises(ObjectDoesNotExist):
-            Todo.objects.get(pk=self.todo.id)
+            Todo.objects.for_author(self.user).get(pk=self.todo.id)
 
     def test_sign_up_with_valid_data(self):
         """Test sign up with correct data."""
@@ -169,3 +183,127 @@ class TodoViewsTests(TestCase):
         user1_todos = response.context['todos']
         self.assertNotIn(todo, user1_todos)
 
+
+@override_settings(TODOS_PER_PAGE=2)
+class TodoPaginationTests(TestCase):
+    """Tests for keyset pagination of the lists"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='User1')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.todos = [Todo.objects.create(title=f'Todo {i}', author=self.user)
+                      for i in range(5)]
+
+    def test_pages_follow_next_cursor(self):
+        """Next cursors walk the whole list newest first without overlaps."""
+        seen = []
+        response = self.authorized_client.get(reverse('current_todos'))
+        while True:
+            page = response.context['page']
+            seen.extend(todo.id for todo in page)
+            if not page.next_cursor:
+                break
+            response = self.authorized_client.get(reverse('current_todos'),
+                                                  {'after': page.next_cursor})
+        self.assertEqual([todo.id for todo in reversed(self.todos)], seen)
+
+    def test_previous_cursor_returns_to_previous_page(self):
+        """Previous cursor renders the same rows as the page before."""
+        Todo.objects.for_author(self.user).update(completed=timezone.now())
+        first = self.authorized_client.get(reverse('completed_todos'))
+        second = self.authorized_client.get(
+            reverse('completed_todos'),
+            {'after': first.context['page'].next_cursor})
+        back = self.authorized_client.get(
+            reverse('completed_todos'),
+            {'before': second.context['page'].previous_cursor})
+        self.assertEqual([todo.id for todo in first.context['page']],
+                         [todo.id for todo in back.context['page']])
+        self.assertIsNone(back.context['page'].previous_cursor)
+
+    def test_invalid_cursor_shows_first_page(self):
+        edited = self.todos[2].edited.isoformat()
+        for cursor in ('not-a-cursor',
+                       encode_raw_cursor(f'{edited}|{"9" * 30}'),
+                       encode_raw_cursor(f'{edited}|{self.todos[2].id}|-1')):
+            with self.subTest(cursor=cursor):
+                response = self.authorized_client.get(reverse('current_todos'),
+                                                      {'after': cursor})
+                self.assertEqual([self.todos[4].id, self.todos[3].id],
+                                 [todo.id for todo in response.context['page']])
+
+    def test_pagination_links_rendered(self):
+        response = self.authorized_client.get(reverse('current_todos'))
+        self.assertContains(response,
+                            f'?after={response.context["page"].next_cursor}')
+
+
+class TodoBulkActionTests(TestCase):
+    """Tests for bulk actions on the lists"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='User1')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        Todo.objects.bulk_create_by_author([Todo(title=f'Todo {i}', author=self.user) for i in range(50)])
+        self.ids = list(Todo.objects.for_author(self.user).order_by('id').values_list('id', flat=True))
+        recount(self.user.id)
+
+    def bulk(self, action, ids, **data):
+        return self.authorized_client.post(reverse('bulk_action'), {'action': action, 'ids': ids, **data})
+
+    def test_complete_reopen_and_delete_selected(self):
+        response = self.bulk('complete', self.ids[:10], next=reverse('completed_todos'))
+        self.assertRedirects(response, reverse('completed_todos'))
+        self.assertEqual(10, Todo.objects.for_author(self.user).filter(completed__isnull=False).count())
+
+        self.bulk('reopen', self.ids[:5])
+        self.assertEqual(5, Todo.objects.for_author(self.user).filter(completed__isnull=False).count())
+        self.bulk('delete', self.ids[:20])
+        self.assertEqual(30, Todo.objects.for_author(self.user).count())
+        stats = TodoStats.objects.using(shard_for(self.user)).get(user=self.user)
+        self.assertEqual((30, 0), (stats.current_count, stats.completed_count))
+
+    def test_queries_do_not_depend_on_selection_size(self):
+        # Session, user, then the todo UPDATE and the stats UPDATE inside a
+        # savepoint; delete also counts the selection first. With shards the
+        # placement of the user is read too.
+        placement = 1 if settings.TODO_SHARDS else 0
+        for action, queries in (('complete', 6), ('reopen', 6), ('delete', 7)):
+            for ids in (self.ids[:2], self.ids[2:]):
+                with self.subTest(action=action, selected=len(ids)):
+                    cache.clear()
+                    with capture_queries() as captured:
+                        self.bulk(action, ids)
+                    self.assertEqual(queries + placement, len(captured))
+
+    def test_edited_is_updated(self):
+        before = Todo.objects.for_author(self.user).get(pk=self.ids[0]).edited
+        self.bulk('complete', [self.ids[0]])
+        self.assertGreater(Todo.objects.for_author(self.user).get(pk=self.ids[0]).edited, before)
+
+    def test_todos_of_other_users_untouched(self):
+        other = Client()
+        other.force_login(User.objects.create_user(username='User2'))
+        other.post(reverse('bulk_action'), {'action': 'delete', 'ids': self.ids})
+        self.assertEqual(50, Todo.objects.for_author(self.user).count())
+
+    def test_unknown_action_and_unsafe_next(self):
+        self.assertEqual(400, self.bulk('archive', self.ids[:1]).status_code)
+        self.assertRedirects(self.bulk('complete', ['²', '9' * 30, self.ids[0]]),
+                             reverse('current_todos'), fetch_redirect_response=False)
+        self.assertRedirects(self.bulk('complete', self.ids[:1], next='https://example.com/'),
+                             reverse('current_todos'), fetch_redirect_response=False)
+
+    def test_lists_render_checkboxes(self):
+        response = self.authorized_client.get(reverse('current_todos'))
+        self.assertContains(response, f'name="ids" value="{self.ids[-1]}" form="bulk-form"')
+        self.assertContains(response, 'value="complete"')
+        self.bulk('complete', self.ids[:1])
+        self.assertContains(self.authorized_client.get(reverse('completed_todos')), 'value="reopen"')
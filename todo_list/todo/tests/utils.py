@@ -0,0 +1,31 @@
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from todo.routers import todo_databases
+
+
+class AllQueries:
+    """The queries run on every database inside ``capture_queries()``."""
+
+    def __init__(self, contexts):
+        self.contexts = contexts
+
+    def __len__(self):
+        return sum(len(context) for context in self.contexts)
+
+
+@contextmanager
+def capture_queries():
+    """``CaptureQueriesContext`` over every database, so counts include the queries sent to shards."""
+    contexts = [CaptureQueriesContext(connections[alias]) for alias in connections]
+    with ExitStack() as stack:
+        for context in contexts:
+            stack.enter_context(context)
+        yield AllQueries(contexts)
+
+
+def count_everywhere(queryset):
+    """``queryset.count()`` summed over the databases holding todos."""
+    return sum(queryset.using(alias).count() for alias in todo_databases())
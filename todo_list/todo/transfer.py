@@ -0,0 +1,137 @@
+"""Streaming NDJSON/CSV export and import of todos.
+
+Rows are read and written one at a time, so memory use does not depend on
+the number of todos moved.
+"""
+import csv
+import json
+
+from django.contrib.auth.models import User
+from django.db import reset_queries
+from django.utils.dateparse import parse_datetime
+
+from .cache import invalidate
+from .models import ArchivedTodo, Todo, keep_edited
+from .routers import todo_databases
+from .stats import recount
+
+FIELDS = ('author', 'title', 'description', 'edited', 'completed')
+FORMATS = ('ndjson', 'csv')
+
+
+def todo_querysets(user=None, replica=False):
+    """The querysets holding the todos of ``user``, or of every user: the todo table and the archive."""
+    if user is not None:
+        return [Todo.objects.for_author(user, replica=replica), ArchivedTodo.objects.for_author(user, replica=replica)]
+    return [model.objects.using(alias) for alias in todo_databases() for model in (Todo, ArchivedTodo)]
+
+
+def export_rows(queryset, chunk_size=2000):
+    """Yield the todos of ``queryset`` as dicts keyed by ``FIELDS``, ``chunk_size`` rows per fetch.
+
+    Usernames are looked up once per author rather than joined, since users
+    and sharded todos live in different databases.
+    """
+    usernames = {}
+    rows = queryset.order_by('id').values_list('author_id', 'title', 'description', 'edited', 'completed')
+    for author_id, title, description, edited, completed in rows.iterator(chunk_size=chunk_size):
+        if author_id not in usernames:
+            usernames[author_id] = User.objects.filter(pk=author_id).values_list('username', flat=True).first()
+        yield {
+            'author': usernames[author_id],
+            'title': title,
+            'description': description,
+            'edited': edited.isoformat(),
+            'completed': completed.isoformat() if completed else None,
+        }
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the written value, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] or '' for field in FIELDS])
+
+
+def serialize(rows, fmt):
+    return ndjson_lines(rows) if fmt == 'ndjson' else csv_lines(rows)
+
+
+def read_rows(file, fmt):
+    """Yield dicts keyed by ``FIELDS`` from an NDJSON or CSV text file."""
+    if fmt == 'ndjson':
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(file)
+
+
+def _parse_datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'{value!r} is not a datetime')
+    return parsed
+
+
+def import_rows(rows, batch_size=2000, username=None):
+    """Insert ``rows`` with ``bulk_create`` in batches of ``batch_size``.
+
+    Rows of unknown authors, and of authors other than ``username`` when it
+    is given, are skipped. The todo counts of the authors are recounted at
+    the end, even when a row fails. Returns ``(imported, skipped)``.
+    """
+    author_ids = {}
+    imported = skipped = 0
+    batch = []
+
+    def flush():
+        nonlocal imported
+        Todo.objects.bulk_create_by_author(batch)
+        imported += len(batch)
+        batch.clear()
+        # With DEBUG on, every multi-row INSERT would stay in connection.queries.
+        reset_queries()
+
+    try:
+        with keep_edited():
+            for row in rows:
+                author = row.get('author')
+                if username is not None and author != username:
+                    skipped += 1
+                    continue
+                if author not in author_ids:
+                    author_ids[author] = User.objects.filter(username=author).values_list('id', flat=True).first()
+                if author_ids[author] is None:
+                    skipped += 1
+                    continue
+                batch.append(Todo(
+                    author_id=author_ids[author],
+                    title=row['title'],
+                    description=row.get('description') or '',
+                    edited=_parse_datetime(row['edited']),
+                    completed=_parse_datetime(row['completed']) if row.get('completed') else None,
+                ))
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+    finally:
+        # Also after a bad row, so the counts include the batches already inserted.
+        for author_id in author_ids.values():
+            if author_id is not None:
+                recount(author_id)
+                invalidate(author_id)
+    return imported, skipped
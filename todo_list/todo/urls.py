@@ -1,19 +1,33 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, async_views, views
+
+views_module = async_views if settings.TODO_ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('current/', views.current_todos, name='current_todos'),
-    path('completed/', views.completed_todos, name='completed_todos'),
+    path('', views_module.index, name='index'),
+    path('current/', views_module.current_todos, name='current_todos'),
+    path('completed/', views_module.completed_todos, name='completed_todos'),
     path('new/', views.create_todo, name='create_todo'),
+    path('search/', views.search, name='search_todos'),
+    path('export/', views.export_todos, name='export_todos'),
+    path('bulk/', views.bulk_action, name='bulk_action'),
 
-    path('<int:todo_id>/', views.view_todo, name='view_todo'),
+    path('<int:todo_id>/', views_module.view_todo, name='view_todo'),
     path('<int:todo_id>/edit/', views.edit_todo, name='edit_todo'),
     path('<int:todo_id>/complete/', views.complete_todo, name='complete_todo'),
     path('<int:todo_id>/delete/', views.delete_todo, name='delete_todo'),
+    path('archive/<int:todo_id>/', views.view_archived_todo, name='view_archived_todo'),
+    path('archive/<int:todo_id>/restore/', views.restore_todo, name='restore_todo'),
 
-    path('sign_up/', views.sign_up, name='sign_up'),
-    path('sign_in/', views.sign_in, name='sign_in'),
+    path('sign_up/', views_module.sign_up, name='sign_up'),
+    path('sign_in/', views_module.sign_in, name='sign_in'),
     path('sign_out/', views.sign_out, name='sign_out'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('live/', views.live_events, name='live_events'),
+
+    path('api/bulk/create/', api.bulk_create_todos, name='api_bulk_create'),
+    path('api/bulk/complete/', api.bulk_complete_todos, name='api_bulk_complete'),
+    path('api/bulk/delete/', api.bulk_delete_todos, name='api_bulk_delete'),
 ]
 
@@ -1,39 +1,120 @@
+from django.conf import settings
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
 from django.contrib.auth import login, authenticate, logout
-from django.db import IntegrityError
+from django.core.exceptions import PermissionDenied
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from django.utils import timezone
 from django.contrib.auth.decorators import login_required
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
 
-from .models import Todo
+from .archive import restore_todo as restore_archived_todo
+from .cache import cache_page_per_user, invalidate
+from .conditional import conditional_todo, conditional_todo_list
+from .deletion import mark_todos
+from .models import ArchivedTodo, Todo, in_id_range
 from .forms import TodoCreateForm
+from .instrumentation import registry
+from .live import publish_resync, publish_todo
+from .pagination import keyset_paginate, tiered_paginate
+from .passwords import Overloaded, attempt_wait, hash_password
+from .routers import shard_for
+from .search import search_todos
+from .stats import adjust
+from .transfer import FORMATS, export_rows, serialize, todo_querysets
+
+
+def render_index(request):
+    return render(request, 'todo/index.html', {'user': request.user})
+
+
+def render_todo_list(request, completed, template_name):
+    todos_list = Todo.objects.for_author(request.user, replica=True).filter(completed__isnull=not completed).rows()
+    if completed:
+        # Archived todos follow the completed ones still in the todo table.
+        archived_list = ArchivedTodo.objects.for_author(request.user, replica=True).rows()
+        page = tiered_paginate([todos_list, archived_list], request)
+    else:
+        page = keyset_paginate(todos_list, request)
+    # Placeholder card that live.js fills in with the todos of live events.
+    live_card = Todo(id=0, title='-', description='-')
+    return render(request, template_name, {'todos': page, 'page': page, 'live_card': live_card})
+
+
+def render_todo(request, todo_id):
+    todo = get_object_or_404(Todo.objects.for_author(request.user, replica=True), pk=todo_id)
+    return render(request, 'todo/view_todo.html', {'todo': todo})
 
 
 def index(request):
     if request.user.is_authenticated:
         return redirect('current_todos')
-    return render(request, 'todo/index.html', {'user': request.user})
+    return render_index(request)
 
 
 @login_required(login_url='sign_in')
+@conditional_todo_list(completed=False)
+@cache_page_per_user
 def current_todos(request):
-    todos_list = Todo.objects.filter(author_id=request.user, completed__isnull=True).order_by('-edited')
-    return render(request, 'todo/view_todos.html', {'todos': todos_list})
+    return render_todo_list(request, completed=False, template_name='todo/view_todos.html')
 
 
 @login_required(login_url='sign_in')
+@conditional_todo_list(completed=True)
+@cache_page_per_user
 def completed_todos(request):
-    todos_list = Todo.objects.filter(author_id=request.user, completed__isnull=False).order_by('-edited')
-    return render(request, 'todo/completed_todos.html', {'todos': todos_list})
+    return render_todo_list(request, completed=True, template_name='todo/completed_todos.html')
 
 
 @login_required(login_url='sign_in')
+@conditional_todo
+@cache_page_per_user
 def view_todo(request, todo_id):
-    todo = get_object_or_404(Todo, pk=todo_id, author_id=request.user)
+    return render_todo(request, todo_id)
+
+
+@login_required(login_url='sign_in')
+def view_archived_todo(request, todo_id):
+    todo = get_object_or_404(ArchivedTodo.objects.for_author(request.user, replica=True), pk=todo_id)
     return render(request, 'todo/view_todo.html', {'todo': todo})
 
 
+@login_required(login_url='sign_in')
+@require_POST
+def restore_todo(request, todo_id):
+    archived = get_object_or_404(ArchivedTodo.objects.for_author(request.user), pk=todo_id)
+    todo = restore_archived_todo(archived)
+    return redirect('view_todo', todo_id=todo.id)
+
+
+@login_required(login_url='sign_in')
+def search(request):
+    query = request.GET.get('q', '')
+    try:
+        page_number = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page_number = 1
+    todos, has_next = search_todos(request.user.id, query, page_number, settings.TODOS_PER_PAGE)
+    return render(request, 'todo/search_results.html', {'todos': todos, 'query': query,
+                                                        'page_number': page_number, 'has_next': has_next})
+
+
+@login_required(login_url='sign_in')
+def export_todos(request):
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        fmt = 'ndjson'
+    rows = (row for todos in todo_querysets(request.user, replica=True) for row in export_rows(todos))
+    lines = serialize(rows, fmt)
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(lines, content_type=f'{content_type}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="todos.{fmt}"'
+    return response
+
+
 @login_required(login_url='sign_in')
 def create_todo(request):
     if request.method == 'GET':
@@ -43,7 +124,10 @@ def create_todo(request):
         try:
             new_todo = form.save(commit=False)
             new_todo.author = request.user
-            new_todo.save()
+            with transaction.atomic(using=shard_for(request.user)):
+                new_todo.save()
+                adjust(request.user.id, current=1)
+                publish_todo(new_todo, 'saved')
             return redirect('current_todos')
         except ValueError:
             return render(request, 'todo/input_todo.html',
@@ -52,7 +136,7 @@ def create_todo(request):
 
 @login_required(login_url='sign_in')
 def edit_todo(request, todo_id):
-    todo = get_object_or_404(Todo, pk=todo_id, author_id=request.user)
+    todo = get_object_or_404(Todo.objects.for_author(request.user), pk=todo_id)
     if request.method == 'GET':
         form = TodoCreateForm(instance=todo)
         return render(request, 'todo/input_todo.html', {'todo': todo, 'form': form})
@@ -60,6 +144,7 @@ def edit_todo(request, todo_id):
         form = TodoCreateForm(request.POST, instance=todo)
         try:
             form.save()
+            publish_todo(todo, 'saved')
             return redirect('current_todos')
         except ValueError:
             return render(request, 'todo/input_todo.html',
@@ -68,51 +153,128 @@ def edit_todo(request, todo_id):
 
 @login_required(login_url='sign_in')
 def complete_todo(request, todo_id):
-    todo = get_object_or_404(Todo, pk=todo_id, author_id=request.user)
+    todo = get_object_or_404(Todo.objects.for_author(request.user), pk=todo_id)
     if request.method == 'POST':
-        todo.completed = timezone.now()
-        todo.save()
+        # Only the request that actually completes the todo moves it between the counts.
+        with transaction.atomic(using=todo._state.db):
+            if Todo.objects.using(todo._state.db).filter(pk=todo.pk, completed__isnull=True).complete():
+                adjust(request.user.id, current=-1, completed=1)
+                publish_todo(todo, 'completed')
+        invalidate(request.user.id)
         return redirect('current_todos')
 
 
 @login_required(login_url='sign_in')
 def delete_todo(request, todo_id):
-    todo = get_object_or_404(Todo, pk=todo_id, author_id=request.user)
+    todo = get_object_or_404(Todo.objects.for_author(request.user), pk=todo_id)
     if request.method == 'POST':
-        todo.delete()
+        with transaction.atomic(using=todo._state.db):
+            # Before delete() clears the id; a rollback drops it with the rest.
+            publish_todo(todo, 'deleted')
+            deleted, _ = todo.delete()
+            if deleted and todo.completed is None:
+                adjust(request.user.id, current=-1)
+            elif deleted:
+                adjust(request.user.id, completed=-1)
         return redirect('current_todos')
 
 
+@login_required(login_url='sign_in')
+@require_POST
+def bulk_action(request):
+    """Complete, reopen or delete the selected todos with one set-based query, whatever their number."""
+    action = request.POST.get('action')
+    ids = [int(todo_id) for todo_id in request.POST.getlist('ids') if todo_id.isdecimal() and in_id_range(int(todo_id))]
+    todos = Todo.objects.for_author(request.user).filter(id__in=ids)
+    with transaction.atomic(using=todos.db):
+        if action == 'complete':
+            changed = todos.filter(completed__isnull=True).complete()
+            current, completed = -changed, changed
+        elif action == 'reopen':
+            changed = todos.filter(completed__isnull=False).reopen()
+            current, completed = changed, -changed
+        elif action == 'delete':
+            counts = todos.aggregate(current=Count('id', filter=Q(completed__isnull=True)),
+                                     completed=Count('id', filter=Q(completed__isnull=False)))
+            changed = mark_todos(todos)
+            current, completed = -counts['current'], -counts['completed']
+        else:
+            return HttpResponseBadRequest('Unknown action.')
+        if changed:
+            adjust(request.user.id, current=current, completed=completed)
+            publish_resync(request.user.id, using=todos.db)
+    if changed:
+        invalidate(request.user.id)
+    next_url = request.POST.get('next')
+    if not url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+        next_url = 'current_todos'
+    return redirect(next_url)
+
+
+# Seconds a client is asked to wait when the password hashing pool is full.
+OVERLOADED_RETRY_AFTER = 60
+
+
+def render_account_form(request, template_name, form, error_message=None, status=200):
+    context = {'form': form}
+    if error_message:
+        context['error_message'] = error_message
+    return render(request, template_name, context, status=status)
+
+
+def render_sign_up(request, error_message=None, status=200):
+    return render_account_form(request, 'todo/sign_up.html', UserCreationForm, error_message, status)
+
+
+def render_sign_in(request, error_message=None, status=200):
+    return render_account_form(request, 'todo/sign_in.html', AuthenticationForm, error_message, status)
+
+
+def render_too_many_attempts(render_form, request, retry_after):
+    """Answer with ``render_form`` and a 429 telling the client to wait ``retry_after`` seconds."""
+    response = render_form(request, f'Too many attempts, please try again in {retry_after} seconds', status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 def sign_up(request):
     if request.method == 'GET':
-        return render(request, 'todo/sign_up.html', {'form': UserCreationForm})
+        return render_sign_up(request)
     else:
         if request.POST['password1'] == request.POST['password2']:
+            username = request.POST['username']
+            wait = attempt_wait(request, username)
+            if wait:
+                return render_too_many_attempts(render_sign_up, request, wait)
             try:
-                username = request.POST['username']
-                password = request.POST['password1']
-                user = User.objects.create_user(username=username, password=password)
+                user = User(username=User.normalize_username(username),
+                            password=hash_password(request.POST['password1']))
                 user.save()
                 login(request, user)
                 return redirect('current_todos')
+            except Overloaded:
+                return render_too_many_attempts(render_sign_up, request, OVERLOADED_RETRY_AFTER)
             except IntegrityError:
-                return render(request, 'todo/sign_up.html', {'form': UserCreationForm,
-                                                             'error_message': 'Login is already taken'})
+                return render_sign_up(request, 'Login is already taken')
         else:
-            return render(request, 'todo/sign_up.html', {'form': UserCreationForm,
-                                                         'error_message': 'Passwords do not match'})
+            return render_sign_up(request, 'Passwords do not match')
 
 
 def sign_in(request):
     if request.method == 'GET':
-        return render(request, 'todo/sign_in.html', {'form': AuthenticationForm})
+        return render_sign_in(request)
     else:
         username = request.POST['username']
         password = request.POST['password']
-        user = authenticate(request, username=username, password=password)
+        wait = attempt_wait(request, username)
+        if wait:
+            return render_too_many_attempts(render_sign_in, request, wait)
+        try:
+            user = authenticate(request, username=username, password=password)
+        except Overloaded:
+            return render_too_many_attempts(render_sign_in, request, OVERLOADED_RETRY_AFTER)
         if user is None:
-            return render(request, 'todo/sign_in.html', {'form': AuthenticationForm,
-                                                         'error_message': 'Incorrect username and/or password'})
+            return render_sign_in(request, 'Incorrect username and/or password')
         else:
             login(request, user)
             return redirect('current_todos')
@@ -122,3 +284,15 @@ def sign_in(request):
 def sign_out(request):
     logout(request)
     return redirect('index')
+
+
+@login_required(login_url='sign_in')
+def metrics(request):
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(registry.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def live_events(request):
+    """Stands in for ``todo.live.LiveEventsApp`` under WSGI: 204 tells the browser not to reconnect."""
+    return HttpResponse(status=204)
@@ -7,9 +7,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv('SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DEBUG', 'True') == 'True'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.getenv('ALLOWED_HOSTS', '').split(',') if host]
 
 
 # Application definition
@@ -25,28 +25,40 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'todo.middleware.StaticFilesMiddleware',
+    'todo.middleware.InstrumentationMiddleware',
+    'todo.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'todo.middleware.CachedAuthenticationMiddleware',
+    'todo.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'todo_list.urls'
 
+# Templates are parsed once and kept in memory outside DEBUG
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'todo.backends.templates.TimedDjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS if DEBUG else [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'todo.context_processors.todo_stats',
             ],
         },
     },
@@ -65,6 +77,108 @@ DATABASES = {
     }
 }
 
+# DB_PROFILE=production switches to the tuned SQLite backend (WAL, pragmas,
+# retries on lock errors, see todo.backends.sqlite3) with kept-alive connections
+
+if os.getenv('DB_PROFILE') == 'production':
+    DATABASES['default'].update({
+        'ENGINE': 'todo.backends.sqlite3',
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '600')),
+    })
+
+# SHARDS=n spreads todos by author over n more databases, db_shard<i>.sqlite3
+# (see todo.routers). TODO_SHARD_REPLICAS maps a shard to the aliases of its
+# read replicas, which need their own DATABASES entries with TEST MIRROR set
+# to the shard. Run manage.py migrate_shards instead of migrate.
+
+TODO_SHARDS = [f'shard{index}' for index in range(int(os.getenv('SHARDS', '0')))]
+for alias in TODO_SHARDS:
+    DATABASES[alias] = {**DATABASES['default'], 'NAME': BASE_DIR / f'db_{alias}.sqlite3'}
+TODO_SHARD_REPLICAS = {}
+DATABASE_ROUTERS = ['todo.routers.ShardRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# The local-memory cache is per process. Use the file-based backend
+# (django.core.cache.backends.filebased.FileBasedCache with a directory as
+# CACHE_LOCATION) when several worker processes serve the site.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Sessions: cached_db (default), cache, db or signed_cookies. Signed cookie
+# sessions need no storage but cannot be ended from the server side.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.getenv('SESSION_BACKEND', 'cached_db')
+
+# Seconds a signed-in user stays in the cache (see todo.middleware.CachedAuthenticationMiddleware)
+
+TODO_USER_CACHE_TIMEOUT = 300
+
+# Seconds a rendered todo page stays in the cache
+
+TODO_CACHE_TIMEOUT = 300
+
+# Serve the read-only views with their async versions (set by asgi.py)
+
+TODO_ASYNC_VIEWS = os.getenv('ASYNC_VIEWS') == 'True'
+
+# Server-Timing headers and per-view latency histograms (see todo.middleware)
+
+TODO_INSTRUMENTATION = os.getenv('INSTRUMENTATION', 'True') == 'True'
+
+# Deferred deletes of todos and accounts run in batches of
+# TODO_PURGE_BATCH_SIZE rows with TODO_PURGE_PAUSE seconds between them, from
+# manage.py purge_deleted or, with PURGE_IN_PROCESS=True, a background thread
+# (see todo.deletion)
+
+TODO_PURGE_BATCH_SIZE = 1000
+TODO_PURGE_PAUSE = 0.05
+TODO_PURGE_IN_PROCESS = os.getenv('PURGE_IN_PROCESS') == 'True'
+
+# Live list updates over Server-Sent Events, served under ASGI (see todo.live):
+# at most TODO_LIVE_MAX_CONNECTIONS streams per process and
+# TODO_LIVE_MAX_PER_USER per user, each queueing TODO_LIVE_QUEUE_SIZE events,
+# with a heartbeat every TODO_LIVE_HEARTBEAT seconds
+
+TODO_LIVE_MAX_CONNECTIONS = int(os.getenv('LIVE_MAX_CONNECTIONS', '10000'))
+TODO_LIVE_MAX_PER_USER = 10
+TODO_LIVE_QUEUE_SIZE = 32
+TODO_LIVE_HEARTBEAT = 15
+TODO_LIVE_RETRY_MS = 5000
+
+# Largest number of items accepted by one bulk API request
+
+TODO_API_MAX_BATCH = 1000
+
+# cProfile dumps of requests from staff asking with ?profile or X-Profile,
+# plus a sampled share of all requests (see todo.profiling)
+
+TODO_PROFILE_DIR = os.getenv('PROFILE_DIR', BASE_DIR / 'profiles')
+TODO_PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+TODO_PROFILE_MAX_FILES = 50
+TODO_PROFILE_MAX_BYTES = 50 * 1024 * 1024
+TODO_PROFILE_TOP_FUNCTIONS = 40
+
+
+AUTHENTICATION_BACKENDS = ['todo.backends.auth.PooledModelBackend']
+
+# Password hashes run on TODO_HASH_WORKERS threads with up to TODO_HASH_QUEUE
+# more waiting; sign-ins beyond that, or beyond (burst, attempts per second)
+# per client address and per username, get a 429 (see todo.passwords)
+
+TODO_HASH_WORKERS = int(os.getenv('HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+TODO_HASH_QUEUE = int(os.getenv('HASH_QUEUE', '16'))
+TODO_LOGIN_LIMITS = {
+    'ip': (20, 1.0),
+    'username': (5, 1 / 30),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -103,11 +217,30 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.2/howto/static-files/
 
 STATIC_URL = '/static/'
-STATICFILES_DIRS = [
-    os.path.join(BASE_DIR, "static")
-]
+STATIC_ROOT = os.getenv('STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+# Content-hashed names plus .gz/.br copies written by collectstatic. Only
+# outside DEBUG, so the development server works without collectstatic.
+
+if not DEBUG:
+    STATICFILES_STORAGE = 'todo.storage.CompressedManifestStaticFilesStorage'
+
+# Serve STATIC_ROOT from the app itself (see todo.middleware.StaticFilesMiddleware)
+
+TODO_SERVE_STATIC = os.getenv('SERVE_STATIC', str(not DEBUG)) == 'True'
+
+# Collapse the whitespace of rendered HTML (see todo.minify) and compress
+# responses of at least TODO_COMPRESS_MIN_LENGTH bytes
+
+TODO_MINIFY_HTML = os.getenv('MINIFY_HTML', 'True') == 'True'
+TODO_COMPRESS_MIN_LENGTH = 512
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Number of todos shown on one page of the current/completed lists
+
+TODOS_PER_PAGE = 20
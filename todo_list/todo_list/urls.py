@@ -16,9 +16,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import redirect
+from todo.admin import profile_download, profile_list
 
 urlpatterns = [
     path('', lambda request: redirect('/todos/')),
     path('todos/', include('todo.urls')),
+    path('admin/profiles/', profile_list, name='profile_list'),
+    path('admin/profiles/<str:filename>', profile_download, name='profile_download'),
     path('admin/', admin.site.urls),
 ]